@@ -9,12 +9,13 @@ from fastapi import FastAPI, Depends, Request, status
 
 from fastapi.responses import ORJSONResponse
 from fastapi_limiter import FastAPILimiter
-from redis.asyncio import Redis
+from redis.asyncio import Redis, RedisCluster
 from starlette.middleware.sessions import SessionMiddleware
 
-from src.cache import redis
+from src.cache import memory, redis, revocation
 from src.configs import settings, LOGGING
 
+from src.endpoints import well_known
 from src.endpoints.v1 import (
     oauth2,
     permissions,
@@ -25,6 +26,10 @@ from src.endpoints.v1 import (
 )
 from src.oauth2_clients import google
 from src.services.start_up import StartUpService
+from src.utils.admission import credential_admission
+from src.utils.passwords import password_hasher
+from src.utils.signer import token_signer
+from src.validators.token import log_decode_cache_stats
 from src.db.clients.postgres import get_postgres_db
 
 
@@ -35,17 +40,43 @@ async def lifespan(app: FastAPI) -> Any:
     )
     await startup_methods.create_empty_role()
     await startup_methods.create_admin_user()
-    redis.redis = redis.RedisCache(
-        Redis(**settings.redis.connection_dict), settings=settings.token
-    )
+    clients: list[Redis | RedisCluster] = []
+    if settings.cache.backend == "memory":
+        # no Redis at all: the sessions and revocations stay in the worker
+        # and the rate limits are off, see src.utils.rate_limiter
+        redis.redis = memory.MemoryCache(settings=settings.token)
+        revocation.revocation_list = revocation.MemoryRevocationList(
+            settings=settings.cache
+        )
+    else:
+        redis_client = settings.redis.create_client()
+        pubsub_client = settings.redis.create_pubsub_client()
+        session_client = settings.redis.create_shard_clients() or redis_client
+        clients = [redis_client, pubsub_client]
+        if isinstance(session_client, list):
+            clients.extend(session_client)
+        redis.redis = redis.RedisCache(session_client, settings=settings.token)
+        revocation.revocation_list = revocation.RevocationList(
+            redis_client, settings=settings.cache, pubsub_redis=pubsub_client
+        )
+        await revocation.revocation_list.load()
+        await revocation.revocation_list.subscribe()
+        await FastAPILimiter.init(redis_client)
     google.oauth2_google_client = google.Oauth2GoogleClient(
         AsyncOAuth2Client(**settings.oauth2.google.settings_dict),
         settings=settings.oauth2.google,
     )
-    await FastAPILimiter.init(Redis(**settings.redis.connection_dict))
     yield
     await redis.redis.close()
-    await FastAPILimiter.close()
+    await revocation.revocation_list.close()
+    # the caches, the revocation list and the limiter share these clients,
+    # so they are closed here, each once
+    for client in {id(client): client for client in clients}.values():
+        await client.aclose()
+    log_decode_cache_stats()
+    token_signer.close()
+    password_hasher.close()
+    credential_admission.close()
 
 
 app = FastAPI(
@@ -59,6 +90,8 @@ app = FastAPI(
 
 @app.middleware("http")
 async def check_request_id(request: Request, call_next):
+    if request.url.path.startswith("/.well-known/"):
+        return await call_next(request)
     request_id = request.headers.get("X-Request-Id")
     if not request_id:
         return ORJSONResponse(
@@ -88,6 +121,7 @@ app.include_router(
 app.include_router(tokens.router, prefix="/auth/v1/tokens", tags=["tokens"])
 app.include_router(roles.router, prefix="/auth/v1/roles", tags=["roles"])
 app.include_router(oauth2.router, prefix="/auth/v1/oauth2", tags=["oauth2"])
+app.include_router(well_known.router, prefix="/.well-known", tags=["well_known"])
 
 if __name__ == "__main__":
     uvicorn.run(
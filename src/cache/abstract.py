@@ -1,46 +1,100 @@
 from abc import ABC, abstractmethod
 
+from src.models.token import RotatedSession, SessionInfo
+
 
 class AbstractCache(ABC):
+    @abstractmethod
+    async def close(self) -> None:
+        """
+        Release the resources held by the cache.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     async def set_token(
         self,
         user_uuid: str,
         token: str | bytes,
+        device: str | None = None,
+        ip_address: str | None = None,
+        role_uuid: str | None = None,
     ) -> None:
         """
-        Set token in the cache.
+        Set token in the cache, evicting the oldest session of the user
+        when the session limit is reached.
 
         Args:
             user_uuid (str): The key to use for caching the token.
             token(str | bytes): str: The token.
+            device (str | None): The user agent of the client.
+            ip_address (str | None): The IP address of the client.
+            role_uuid (str | None): The role of the user at login.
         """
         raise NotImplementedError
 
     @abstractmethod
-    async def get_tokens(self, user_uuid: str) -> list[bytes] | None:
+    async def get_sessions(self, user_uuid: str) -> dict[str, SessionInfo] | None:
         """
-        Get tokens from the cache.
+        Get the user's live sessions from the cache.
 
         Args:
-            user_uuid (str): The key used for caching the tokens.
+            user_uuid (str): The UUID of the user.
 
         Returns:
-            The cached tokens, or None if the tokens are not in the cache.
+            The SessionInfo of every session by session id ordered by expiry,
+            or None if the user has no sessions.
         """
         raise NotImplementedError
 
     @abstractmethod
     async def delete_tokens(
         self, user_uuid: str, token: bytes | str, all_tokens: bool = False
-    ) -> None:
+    ) -> bool:
         """
         Delete tokens from the cache.
 
+        Nothing is deleted unless the token has a live session.
+
         Args:
-            user_uuid (str): The pattern used for search the tokens to delete; key prefix.
-            token (bytes | str): The parameter to build key to delete.
+            user_uuid (str): The UUID of the user whose session index is used.
+            token (bytes | str): The token whose session is removed.
             all_tokens (bool) The parameter to switch between single and multiply deletion.
 
+        Returns:
+            True if the token had a live session and the sessions were deleted.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_sessions(self, user_uuids: list[str]) -> None:
+        """
+        Delete all sessions of many users at once.
+
+        Args:
+            user_uuids (list[str]): The UUIDs of the users.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def rotate_token(
+        self, user_uuid: str, old_token: str | bytes, new_token: str
+    ) -> RotatedSession | None:
+        """
+        Atomically replace a refresh token of the user with a new one.
+
+        A token rotated less than refresh_grace_period_in_seconds ago
+        resolves to the refresh token that replaced it, so concurrent
+        refreshes with the same token all end up in the same session.
+
+        Args:
+            user_uuid (str): The UUID of the user owning the session.
+            old_token (str | bytes): The refresh token presented by the client.
+            new_token (str): The refresh token that replaces it.
+
+        Returns:
+            The refresh token of the session and its role if the old token
+            belonged to the user and was replaced or rotated within the grace
+            period, None otherwise.
         """
         raise NotImplementedError
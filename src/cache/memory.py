@@ -0,0 +1,273 @@
+import logging
+
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from src.configs import TokenSettings
+from src.cache.abstract import AbstractCache
+from src.models.token import RotatedSession, SessionInfo
+from src.utils.digest import token_digest
+
+logger = logging.getLogger("MemoryCache")
+
+
+class MemoryCache(AbstractCache):
+    """
+    In-process session cache with the semantics of RedisCache.
+
+    Sessions live in a dict per user keyed by session id, expire after the
+    token TTL and the session that expires first is evicted when the user
+    reaches the session limit. The expired sessions of a user are dropped
+    when the user is accessed, and those of all users by a sweep run from
+    set_token at most every sweep_interval_in_seconds. No method awaits in the middle of an update,
+    so every operation is atomic within the event loop. The sessions are
+    not shared between workers, so the backend suits tests, benchmarks and
+    single-worker deployments only.
+
+    Args:
+        settings (TokenSettings): The token settings.
+    """
+
+    sweep_interval_in_seconds = 60
+
+    def __init__(self, settings: TokenSettings):
+        self.__settings = settings
+        self.__next_sweep = 0
+        self.__sessions: dict[str, dict[str, SessionInfo]] = {}
+        self.__grace: OrderedDict[
+            tuple[str, str], tuple[int, str, RotatedSession]
+        ] = OrderedDict()
+
+    async def close(self) -> None:
+        """
+        Drop all sessions.
+        """
+        self.__sessions.clear()
+        self.__grace.clear()
+        logger.info("Memory cache was cleared.")
+
+    @property
+    def _ttl(self) -> timedelta:
+        return timedelta(minutes=self.__settings.expire_time_in_minutes)
+
+    @property
+    def _lifetime(self) -> int:
+        return self.__settings.absolute_expire_time_in_minutes * 60
+
+    def __expires_at(self, session: SessionInfo, now: int) -> int:
+        expires_at = session.expires_at
+        if self.__settings.sliding_expiry:
+            expires_at = now + int(self._ttl.total_seconds())
+        if self._lifetime:
+            expires_at = min(expires_at, session.issued_at + self._lifetime)
+        return expires_at
+
+    @staticmethod
+    def _now() -> int:
+        return int(datetime.now(timezone.utc).timestamp())
+
+    def __live_sessions(self, user_uuid: str, now: int) -> dict[str, SessionInfo]:
+        sessions = self.__sessions.get(user_uuid, {})
+        expired = [sid for sid, info in sessions.items() if info.expires_at <= now]
+        for session_id in expired:
+            del sessions[session_id]
+        return sessions
+
+    def __purge_grace(self, now: int) -> None:
+        # the grace period is the same for every record, so the records
+        # expire in the order they were added
+        while self.__grace and next(iter(self.__grace.values()))[0] <= now:
+            self.__grace.popitem(last=False)
+
+    def __sweep(self, now: int) -> None:
+        """
+        Drop the expired sessions and grace records of all users.
+        """
+        if now < self.__next_sweep:
+            return
+        self.__next_sweep = now + self.sweep_interval_in_seconds
+        for user_uuid in list(self.__sessions):
+            if not self.__live_sessions(user_uuid, now):
+                del self.__sessions[user_uuid]
+        self.__purge_grace(now)
+
+    def __store(
+        self,
+        user_uuid: str,
+        sessions: dict[str, SessionInfo],
+        new_session_id: str | None = None,
+    ) -> None:
+        overflow = len(sessions) - self.__settings.user_max_sessions
+        if overflow > 0:
+            # sorted is stable, so the sessions expiring in the same second
+            # are evicted in the order they were added
+            oldest = sorted(
+                (sid for sid in sessions if sid != new_session_id),
+                key=lambda sid: sessions[sid].expires_at,
+            )
+            for session_id in oldest[:overflow]:
+                del sessions[session_id]
+        if sessions:
+            self.__sessions[user_uuid] = sessions
+        else:
+            self.__sessions.pop(user_uuid, None)
+
+    async def set_token(
+        self,
+        user_uuid: str,
+        token: str | bytes,
+        device: str | None = None,
+        ip_address: str | None = None,
+        role_uuid: str | None = None,
+    ) -> None:
+        """
+        Set token in the cache.
+
+        When the user already has the maximum number of sessions, the session
+        that expires first is evicted. Sessions expiring in the same second
+        are evicted in the order they were created, and the new session
+        itself is never evicted.
+
+        Args:
+            user_uuid (UUID): The key to use for caching the token.
+            token(str | bytes): str: The token.
+            device (str | None): The user agent of the client.
+            ip_address (str | None): The IP address of the client.
+            role_uuid (str | None): The role of the user at login.
+        """
+        now = self._now()
+        self.__sweep(now)
+        sessions = self.__live_sessions(user_uuid, now)
+        ttl = int(self._ttl.total_seconds())
+        session_id = token_digest(token)
+        sessions.pop(session_id, None)
+        sessions[session_id] = SessionInfo(
+            issued_at=now,
+            expires_at=now + (min(ttl, self._lifetime) if self._lifetime else ttl),
+            last_used_at=now,
+            device=device,
+            ip_address=ip_address,
+            role_uuid=role_uuid,
+        )
+        self.__store(user_uuid, sessions, session_id)
+
+    async def get_sessions(self, user_uuid: str) -> dict[str, SessionInfo] | None:
+        """
+        Get the user's live sessions from the cache.
+
+        Args:
+            user_uuid (str): The UUID of the user.
+
+        Returns:
+            The SessionInfo of every session by session id ordered by expiry,
+            or None if the user has no sessions.
+        """
+        now = self._now()
+        live = sorted(
+            (
+                (session_id, session.model_copy())
+                for session_id, session in self.__sessions.get(user_uuid, {}).items()
+                if session.expires_at > now
+            ),
+            key=lambda item: item[1].expires_at,
+        )
+        return dict(live) or None
+
+    async def delete_tokens(
+        self, user_uuid: str, token: bytes | str, all_tokens: bool = False
+    ) -> bool:
+        """
+        Delete tokens from the cache.
+
+        The sessions are only deleted if the token has a live session, as in
+        RedisCache.delete_tokens.
+
+        Args:
+            user_uuid (str): The UUID of the user whose session index is used.
+            token (bytes | str): The token whose session is removed.
+            all_tokens (bool) The parameter to switch between single and multiply deletion.
+
+        Returns:
+            True if the token had a live session and the sessions were deleted.
+        """
+        sessions = self.__live_sessions(user_uuid, self._now())
+        live = sessions.pop(token_digest(token), None) is not None
+        if live and all_tokens:
+            sessions.clear()
+        self.__store(user_uuid, sessions)
+        return live
+
+    async def delete_sessions(self, user_uuids: list[str]) -> None:
+        """
+        Delete all sessions of many users at once.
+
+        Args:
+            user_uuids (list[str]): The UUIDs of the users.
+        """
+        for user_uuid in user_uuids:
+            self.__sessions.pop(user_uuid, None)
+
+    async def rotate_token(
+        self, user_uuid: str, old_token: str | bytes, new_token: str
+    ) -> RotatedSession | None:
+        """
+        Replace a refresh token of the user with a new one.
+
+        The session is extended as in RedisCache.rotate_token.
+
+        Args:
+            user_uuid (str): The UUID of the user owning the session.
+            old_token (str | bytes): The refresh token presented by the client.
+            new_token (str): The refresh token that replaces it.
+
+        Returns:
+            The refresh token of the session and its role if the old token
+            belonged to the user and was replaced or rotated within the grace
+            period, None otherwise.
+        """
+        now = self._now()
+        self.__purge_grace(now)
+        session_id = token_digest(old_token)
+        sessions = self.__live_sessions(user_uuid, now)
+        session = sessions.get(session_id)
+        if session is None:
+            self.__store(user_uuid, sessions)
+            _, new_session_id, rotated = self.__grace.get(
+                (user_uuid, session_id), (0, "", None)
+            )
+            if rotated and new_session_id in sessions:
+                return rotated.model_copy()
+            return None
+        session = session.model_copy(
+            update={
+                "expires_at": self.__expires_at(session, now),
+                "last_used_at": now,
+            }
+        )
+        if session.expires_at <= now:
+            del sessions[session_id]
+            self.__store(user_uuid, sessions)
+            return None
+        new_session_id = token_digest(new_token)
+        if self.__settings.sliding_expiry:
+            del sessions[session_id]
+            sessions[new_session_id] = session
+        else:
+            # the session keeps its expiry and so its place among the
+            # sessions expiring in the same second, as in RedisCache
+            sessions = {
+                new_session_id if sid == session_id else sid: (
+                    session if sid == session_id else info
+                )
+                for sid, info in sessions.items()
+            }
+        self.__store(user_uuid, sessions, new_session_id)
+        rotated = RotatedSession(refresh=new_token, role_uuid=session.role_uuid)
+        grace_period = self.__settings.refresh_grace_period_in_seconds
+        if grace_period > 0:
+            self.__grace[(user_uuid, session_id)] = (
+                now + grace_period,
+                new_session_id,
+                rotated,
+            )
+        return rotated.model_copy()
@@ -1,147 +1,489 @@
+import asyncio
+import json
 import logging
 
-from datetime import timedelta
-from typing import Any
-from redis.asyncio import Redis
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, cast
+from redis.asyncio import Redis, RedisCluster
+from redis.commands.core import AsyncScript
 
 from src.configs import TokenSettings
+from src.cache import scripts
 from src.cache.abstract import AbstractCache
+from src.models.token import RotatedSession, SessionInfo
+from src.utils.digest import token_digest
+from src.utils.hashring import ConsistentHashRing
 
 logger = logging.getLogger("RedisCache")
 
 
 class RedisCache(AbstractCache):
-    def __init__(self, cache: Redis, settings: TokenSettings):
-        self.__cache = cache
+    """
+    Session cache stored in Redis.
+
+    Given a list of independent Redis instances, the sessions are sharded by
+    user: a consistent hash ring on the user UUID picks the instance of every
+    user, so adding an instance moves only the users of the ring segments it
+    takes over.
+
+    Args:
+        cache (Redis | RedisCluster | list[Redis]): The Redis client or the
+            clients of the shards.
+        settings (TokenSettings): The token settings.
+    """
+
+    # legacy keys start with a user UUID, new keys with "sessions:"
+    _legacy_pattern = "????????-????-????-????-????????????:*"
+
+    def __init__(
+        self, cache: Redis | RedisCluster | list[Redis], settings: TokenSettings
+    ):
+        shards: list[Redis | RedisCluster] = (
+            list(cache) if isinstance(cache, list) else [cache]
+        )
+        self.__shards = {self._shard_name(shard): shard for shard in shards}
+        self.__ring = ConsistentHashRing(list(self.__shards))
         self.__settings = settings
+        # scripts run on cluster clients as well, see _run_script
+        registry = cast(Redis, shards[0])
+        self.__set_token = registry.register_script(scripts.SET_TOKEN)
+        self.__rotate_token = registry.register_script(scripts.ROTATE_TOKEN)
+        self.__delete_sessions = registry.register_script(scripts.DELETE_SESSIONS)
+        self.__take_legacy_session = registry.register_script(
+            scripts.TAKE_LEGACY_SESSION
+        )
 
-    async def close(self) -> None:
+    @staticmethod
+    def _shard_name(shard: Redis | RedisCluster) -> str:
+        if isinstance(shard, RedisCluster):
+            return "cluster"
+        kwargs = shard.connection_pool.connection_kwargs
+        return f"{kwargs.get('host')}:{kwargs.get('port')}"
+
+    def _client(self, user_uuid: str) -> Redis | RedisCluster:
         """
-        Close the connection with Redis.
+        Get the client of the shard holding the sessions of a user.
         """
-        await self.__cache.aclose()
-        logger.info("Connection to Redis was closed.")
+        return self.__shards[self.__ring.get_node(user_uuid)]
 
-    async def ping(self) -> Any:
+    async def _run_script(
+        self, script: AsyncScript, user_uuid: str, keys: list[str], args: list[Any]
+    ) -> Any:
         """
-        Ping the Redis server to ensure the connection is still alive.
+        Run a script on the shard holding the sessions of a user.
+
+        AsyncScript is typed for Redis clients only; a cluster client runs it
+        the same way, on the node of the keys, which share one hash slot.
         """
-        return await self.__cache.ping()
+        return await script(
+            keys=keys, args=args, client=cast(Redis, self._client(user_uuid))
+        )
 
-    async def __collect_keys(self, user_uuid: str) -> list[str] | None:
+    async def close(self) -> None:
         """
-        Collect all the user's refresh_token.
+        Log the usage of the connection pools.
 
-        Args:
-            user_uuid (str): The user's UUID for searching for keys.
+        The clients are owned and closed by the application lifespan.
+        """
+        logger.info("Redis pool stats: %s.", self.pool_stats())
 
-        Returns:
-            list[str] | None: returns refresh_token if any
+    def pool_stats(self) -> dict[str, int]:
+        """
+        Get the usage of the connection pool.
+
+        For a cluster client or several shards the usage is summed over the
+        pools of all nodes.
         """
-        keys = []
-        async for key in self.__cache.scan_iter(f"{user_uuid}:*", 10000):
-            keys.append(key)
-            if len(keys) == self.__settings.user_max_sessions:
-                break
-        return keys
+        stats = {"max_connections": 0, "created": 0, "in_use": 0, "available": 0}
+        for shard in self.__shards.values():
+            for key, value in self._pool_stats(shard).items():
+                stats[key] += value
+        return stats
 
     @staticmethod
-    def _build_key(user_uuid: str, token: bytes | str) -> str:
+    def _pool_stats(shard: Redis | RedisCluster) -> dict[str, int]:
+        if isinstance(shard, RedisCluster):
+            nodes = shard.get_nodes()
+            created = sum(len(node._connections) for node in nodes)
+            available = sum(len(node._free) for node in nodes)
+            return {
+                "max_connections": sum(node.max_connections for node in nodes),
+                "created": created,
+                "in_use": created - available,
+                "available": available,
+            }
+        pool = shard.connection_pool
+        in_use = len(pool._in_use_connections)
+        available = len(pool._available_connections)
+        return {
+            "max_connections": pool.max_connections,
+            "created": in_use + available,
+            "in_use": in_use,
+            "available": available,
+        }
+
+    async def ping(self) -> Any:
+        """
+        Ping the Redis servers to ensure the connections are still alive.
         """
-        Build a key for a specific user based on their UUID and a token.
+        return all([await shard.ping() for shard in self.__shards.values()])
+
+    @property
+    def _ttl(self) -> timedelta:
+        return timedelta(minutes=self.__settings.expire_time_in_minutes)
+
+    @property
+    def _lifetime(self) -> int:
+        return self.__settings.absolute_expire_time_in_minutes * 60
+
+    @staticmethod
+    def _clock() -> float:
+        return datetime.now(timezone.utc).timestamp()
+
+    @classmethod
+    def _now(cls) -> int:
+        return int(cls._clock())
+
+    @staticmethod
+    def _build_keys(user_uuid: str) -> list[str]:
+        """
+        Build the keys holding the sessions of a specific user.
+
+        The first key is the session index: a sorted set whose members are
+        the ids of the user's sessions scored by their expiry timestamp, so every
+        operation on it costs O(log N) of the user's own sessions instead of
+        a keyspace scan. The second key is a hash with the SessionInfo of
+        every session in the index. A session id is the digest of its refresh
+        token, so neither key keeps the token itself.
 
         Args:
             user_uuid (str): The UUID of the user.
-            token (bytes|str): The token to be used in the key generation.
-                It can be either a string or a bytes object.
 
         Returns:
-            The built cache key.
+            The session index key and the session metadata key.
+        """
+        return [f"sessions:{{{user_uuid}}}", f"sessions:{{{user_uuid}}}:meta"]
+
+    @staticmethod
+    def _build_legacy_key(user_uuid: str, token: bytes | str) -> str:
+        """
+        Build the key a session was stored under before the session index:
+        a string key made of the user UUID and the full refresh token.
         """
         if isinstance(token, bytes):
             token = str(token, encoding="utf-8")
         return f"{user_uuid}:{token}"
 
+    async def __legacy_keys(
+        self, client: Redis | RedisCluster, user_uuid: str
+    ) -> list[bytes]:
+        return [key async for key in client.scan_iter(f"{user_uuid}:*", 10000)]
+
+    async def __batch_legacy_keys(
+        self, client: Redis | RedisCluster, user_uuids: list[str]
+    ) -> list[bytes]:
+        """
+        Find the legacy keys of many users with a single scan of the keyspace.
+        """
+        users = {user_uuid.encode("utf-8") for user_uuid in user_uuids}
+        return [
+            key
+            async for key in client.scan_iter(self._legacy_pattern, 10000)
+            if key.split(b":", 1)[0] in users
+        ]
+
+    @staticmethod
+    def _build_grace_key(user_uuid: str, session_id: str) -> str:
+        """
+        Build the key of the grace record left by the rotation of a session.
+        """
+        return f"sessions:{{{user_uuid}}}:grace:{session_id}"
+
     async def set_token(
         self,
         user_uuid: str,
         token: str | bytes,
+        device: str | None = None,
+        ip_address: str | None = None,
+        role_uuid: str | None = None,
     ) -> None:
         """
         Set token in the cache.
 
+        When the user already has the maximum number of sessions, the session
+        that expires first is evicted within the same atomic call. Sessions
+        expiring in the same second are evicted in the order they were
+        created, and the new session itself is never evicted.
+
         Args:
             user_uuid (UUID): The key to use for caching the token.
             token(str | bytes): str: The token.
+            device (str | None): The user agent of the client.
+            ip_address (str | None): The IP address of the client.
+            role_uuid (str | None): The role of the user at login.
         """
-        key = self._build_key(user_uuid, token)
+        clock = self._clock()
+        now = int(clock)
+        ttl = int(self._ttl.total_seconds())
+        lifetime = min(ttl, self._lifetime) if self._lifetime else ttl
+        session = SessionInfo(
+            issued_at=now,
+            expires_at=now + lifetime,
+            last_used_at=now,
+            device=device,
+            ip_address=ip_address,
+            role_uuid=role_uuid,
+        )
+        await self.__store_session(user_uuid, token_digest(token), session, clock)
 
+    async def __store_session(
+        self, user_uuid: str, session_id: str, session: SessionInfo, clock: float
+    ) -> None:
+        keys = self._build_keys(user_uuid)
         try:
-            await self.__cache.set(
-                name=key,
-                value=token,
-                ex=timedelta(minutes=self.__settings.expire_time_in_minutes),
+            await self._run_script(
+                self.__set_token,
+                user_uuid,
+                keys=keys,
+                args=[
+                    session_id,
+                    clock,
+                    int(self._ttl.total_seconds()),
+                    self.__settings.user_max_sessions,
+                    session.model_dump_json(by_alias=True, exclude_none=True),
+                ],
             )
         except Exception as error:
             logger.error(
                 "Error setting value with key `%s::%s`: %s.",
-                key,
-                token,
+                keys[0],
+                session_id,
                 error,
             )
             raise
 
-    async def get_tokens(
-        self,
-        user_uuid: str,
-    ) -> list[bytes] | None:
+    async def get_sessions(self, user_uuid: str) -> dict[str, SessionInfo] | None:
         """
-        Get tokens from the cache.
+        Get the user's live sessions from the cache.
+
+        The sessions are read from the metadata hash with a single HGETALL,
+        so the listing costs one round trip whatever the number of sessions.
 
         Args:
-            user_uuid (UUID): The key used for caching the tokens.
+            user_uuid (str): The UUID of the user.
 
         Returns:
-            The cached tokens, or None if the tokens are not in the cache.
+            The SessionInfo of every session by session id ordered by expiry,
+            or None if the user has no sessions.
         """
-        keys = await self.__collect_keys(user_uuid)
+        _, meta_key = self._build_keys(user_uuid)
 
         try:
-            values = await self.__cache.mget(keys)
-            if not values:
-                return None
+            values = await cast(
+                Awaitable[dict[bytes, bytes]],
+                self._client(user_uuid).hgetall(meta_key),
+            )
         except Exception as error:
             logger.error("Error getting value with key `%s`: %s.", user_uuid, error)
             raise
 
-        return values
+        now = self._now()
+        sessions = [
+            (str(session_id, encoding="utf-8"), SessionInfo.model_validate_json(raw))
+            for session_id, raw in values.items()
+        ]
+        live = sorted(
+            (item for item in sessions if item[1].expires_at > now),
+            key=lambda item: item[1].expires_at,
+        )
+        return dict(live) or None
 
     async def delete_tokens(
         self, user_uuid: str, token: bytes | str, all_tokens: bool = False
-    ) -> None:
+    ) -> bool:
         """
         Delete tokens from the cache.
 
+        The sessions are only deleted if the token has a live session, which
+        is checked and deleted by one script, so a token that is forged or
+        already logged out cannot end the other sessions of the user.
+
         Args:
-            user_uuid (str): The pattern used for search the tokens to delete; key prefix.
-            token (bytes | str): The parameter to build key to delete.
+            user_uuid (str): The UUID of the user whose session index is used.
+            token (bytes | str): The token whose session is removed.
             all_tokens (bool) The parameter to switch between single and multiply deletion.
 
+        Returns:
+            True if the token had a live session and the sessions were deleted.
         """
-        if all_tokens:
-            keys = await self.__collect_keys(user_uuid)
-        else:
-            keys = [self._build_key(user_uuid, token)]
+        key, meta_key = self._build_keys(user_uuid)
+        client = self._client(user_uuid)
         try:
-            await self.__cache.delete(*keys)
+            live = await self._run_script(
+                self.__delete_sessions,
+                user_uuid,
+                keys=[key, meta_key],
+                args=[token_digest(token), self._clock(), int(all_tokens)],
+            )
+            if self.__settings.accept_legacy_session_keys:
+                legacy_key = self._build_legacy_key(user_uuid, token)
+                live = await client.delete(legacy_key) or live
+                if live and all_tokens:
+                    legacy_keys = await self.__legacy_keys(client, user_uuid)
+                    await client.delete(key, meta_key, *legacy_keys)
         except Exception as get_error:
-            logger.error("Error deletion value with key `%s`: %s.", keys, get_error)
+            logger.error("Error deletion value with key `%s`: %s.", key, get_error)
+            raise
+        return bool(live)
+
+    async def delete_sessions(self, user_uuids: list[str]) -> None:
+        """
+        Delete all sessions of many users at once.
+
+        The deletions are sent in one non-transactional pipeline per shard,
+        all shards at once, so a batch of users costs a single round trip per
+        Redis node. With accept_legacy_session_keys enabled, the legacy keys
+        of the whole batch are found by one keyspace scan per shard.
+
+        Args:
+            user_uuids (list[str]): The UUIDs of the users.
+        """
+        batches: dict[str, list[str]] = {}
+        for user_uuid in user_uuids:
+            batches.setdefault(self.__ring.get_node(user_uuid), []).append(user_uuid)
+        try:
+            await asyncio.gather(
+                *(
+                    self.__delete_batch(self.__shards[shard], batch)
+                    for shard, batch in batches.items()
+                )
+            )
+        except Exception as error:
+            logger.error(
+                "Error deleting sessions of %s users: %s.", len(user_uuids), error
+            )
+            raise
+
+    async def __delete_batch(
+        self, shard: Redis | RedisCluster, user_uuids: list[str]
+    ) -> None:
+        async with shard.pipeline(transaction=False) as pipe:
+            for user_uuid in user_uuids:
+                pipe.delete(*self._build_keys(user_uuid))
+            if self.__settings.accept_legacy_session_keys:
+                for legacy_key in await self.__batch_legacy_keys(shard, user_uuids):
+                    pipe.delete(legacy_key)
+            await pipe.execute()
+
+    async def rotate_token(
+        self, user_uuid: str, old_token: str | bytes, new_token: str
+    ) -> RotatedSession | None:
+        """
+        Atomically replace a refresh token of the user with a new one.
+
+        The ownership check, the removal of the old token, the insertion of
+        the new one and the session limit are applied by a single server-side
+        script, so a refresh costs one round trip and a refresh token cannot
+        be spent twice by concurrent requests. With accept_legacy_session_keys
+        enabled, a session still stored under its legacy key is moved into
+        the session index first, keeping its expiry. With sliding_expiry
+        enabled the
+        session is extended by the TTL, never past its absolute lifetime
+        counted from the login; otherwise it keeps its original expiry.
+        The new refresh token is kept under a grace record of the old
+        session for refresh_grace_period_in_seconds, which concurrent
+        refreshes with the old token are answered from.
+
+        Args:
+            user_uuid (str): The UUID of the user owning the session.
+            old_token (str | bytes): The refresh token presented by the client.
+            new_token (str): The refresh token that replaces it.
+
+        Returns:
+            The refresh token of the session and its role if the old token
+            belonged to the user and was replaced or rotated within the grace
+            period, None otherwise.
+        """
+        session_id = token_digest(old_token)
+        rotated = await self.__rotate(user_uuid, session_id, new_token)
+        if not rotated and self.__settings.accept_legacy_session_keys:
+            if await self.__migrate_legacy_session(user_uuid, old_token):
+                rotated = await self.__rotate(user_uuid, session_id, new_token)
+        if not rotated:
+            return None
+        # cjson may encode a table without a role as an empty array
+        session = json.loads(rotated) or {}
+        return RotatedSession(
+            refresh=session.get("refresh", new_token), role_uuid=session.get("role")
+        )
+
+    async def __rotate(self, user_uuid: str, session_id: str, new_token: str) -> Any:
+        keys = [
+            *self._build_keys(user_uuid),
+            self._build_grace_key(user_uuid, session_id),
+        ]
+        grace_period = self.__settings.refresh_grace_period_in_seconds
+        try:
+            return await self._run_script(
+                self.__rotate_token,
+                user_uuid,
+                keys=keys,
+                args=[
+                    session_id,
+                    self._clock(),
+                    int(self._ttl.total_seconds()),
+                    self.__settings.user_max_sessions,
+                    token_digest(new_token),
+                    "1" if self.__settings.sliding_expiry else "0",
+                    self._lifetime,
+                    grace_period,
+                    new_token if grace_period > 0 else "",
+                ],
+            )
+        except Exception as error:
+            logger.error("Error rotating token with key `%s`: %s.", keys[0], error)
+            raise
+
+    async def __migrate_legacy_session(
+        self, user_uuid: str, token: bytes | str
+    ) -> bool:
+        """
+        Move a session stored under its legacy key into the session index.
+
+        The legacy key is deleted atomically, so concurrent refreshes migrate
+        it once. The session keeps its expiry; its issue time is derived from
+        it, as legacy sessions were never extended.
+
+        Args:
+            user_uuid (str): The UUID of the user owning the session.
+            token (bytes | str): The refresh token of the session.
+
+        Returns:
+            True if the session was found and migrated.
+        """
+        key = self._build_legacy_key(user_uuid, token)
+        try:
+            ttl = await self._run_script(
+                self.__take_legacy_session, user_uuid, keys=[key], args=[]
+            )
+        except Exception as error:
+            logger.error("Error migrating session with key `%s`: %s.", key, error)
             raise
-        return
+        if ttl <= 0:
+            return False
+        clock = self._clock()
+        now = int(clock)
+        session = SessionInfo(
+            issued_at=min(now, now + ttl - int(self._ttl.total_seconds())),
+            expires_at=now + ttl,
+            last_used_at=now,
+        )
+        await self.__store_session(user_uuid, token_digest(token), session, clock)
+        return True
 
 
-redis: RedisCache | None = None
+redis: AbstractCache | None = None
 
 
-async def get_redis() -> RedisCache | None:
+async def get_redis() -> AbstractCache | None:
     return redis
@@ -0,0 +1,266 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from redis.asyncio import Redis, RedisCluster
+from redis.asyncio.client import PubSub
+
+from src.configs.cache import CacheSettings
+from src.utils.bloom import BloomFilter
+
+logger = logging.getLogger("RevocationList")
+
+
+class RevocationList:
+    """
+    Denylist of revoked access tokens.
+
+    Revoked token ids are kept in a Redis sorted set scored by the token
+    expiry, so an entry lives exactly as long as the token would. Every worker
+    mirrors the set in a Bloom filter kept up to date over pub/sub: a token
+    missing from the filter is accepted without any I/O and Redis is asked
+    only on a filter hit. When the channel fails, the worker subscribes
+    again and reloads the filter, so it misses no revocation published
+    while it was not listening.
+
+    Args:
+        redis (Redis | RedisCluster): The Redis client.
+        settings (CacheSettings): The revocation settings.
+        pubsub_redis (Redis): The client used for the revocation channel.
+            A cluster client can neither publish nor subscribe, so in the
+            cluster mode it is a plain connection to one of the nodes.
+    """
+
+    key = "revoked_tokens"
+    poll_timeout_in_seconds = 1.0
+
+    def __init__(
+        self,
+        redis: Redis | RedisCluster,
+        settings: CacheSettings,
+        pubsub_redis: Redis,
+    ):
+        self.__redis = redis
+        self.__pubsub_redis = pubsub_redis
+        self.__settings = settings
+        self.__filter = self.__new_filter()
+        self.__loading: set[str] | None = None
+        self.__tasks: list[asyncio.Task[None]] = []
+
+    def __new_filter(self) -> BloomFilter:
+        return BloomFilter(
+            self.__settings.revocation_capacity,
+            self.__settings.revocation_error_rate,
+        )
+
+    @staticmethod
+    def _now() -> int:
+        return int(datetime.now(timezone.utc).timestamp())
+
+    def __remember(self, jti: str) -> None:
+        self.__filter.add(jti)
+        if self.__loading is not None:
+            self.__loading.add(jti)
+
+    async def load(self) -> None:
+        """
+        Rebuild the local filter from the denylist, dropping expired entries.
+        """
+        self.__loading = set()
+        try:
+            await self.__redis.zremrangebyscore(self.key, "-inf", self._now())
+            revoked = await self.__redis.zrange(self.key, 0, -1)
+            bloom_filter = self.__new_filter()
+            for jti in revoked:
+                bloom_filter.add(str(jti, encoding="utf-8"))
+            for jti in self.__loading:
+                bloom_filter.add(jti)
+            self.__filter = bloom_filter
+        except Exception as error:
+            logger.error("Error loading revoked tokens: %s.", error)
+            raise
+        finally:
+            self.__loading = None
+        logger.info("Loaded %s revoked tokens.", len(revoked))
+
+    async def subscribe(self) -> None:
+        """
+        Start following revocations of other workers and rebuilding the
+        filter periodically.
+        """
+        pubsub = await self.__subscribe()
+        self.__tasks = [
+            asyncio.create_task(self.__listen(pubsub)),
+            asyncio.create_task(self.__rebuild()),
+        ]
+
+    async def __subscribe(self) -> PubSub:
+        pubsub = self.__pubsub_redis.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(self.__settings.revocation_channel)
+        except Exception:
+            await pubsub.aclose()
+            raise
+        return pubsub
+
+    async def __resubscribe(self) -> PubSub:
+        while True:
+            await asyncio.sleep(
+                self.__settings.revocation_resubscribe_interval_in_seconds
+            )
+            try:
+                pubsub = await self.__subscribe()
+            except Exception as error:
+                logger.error("Error subscribing to revoked tokens: %s.", error)
+                continue
+            try:
+                await self.load()
+            except Exception:
+                pass
+            return pubsub
+
+    async def __listen(self, pubsub: PubSub) -> None:
+        # polling with a timeout rather than listen(): an idle blocking read
+        # would raise once the socket timeout is over
+        while True:
+            try:
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True,
+                        timeout=self.poll_timeout_in_seconds,
+                    )
+                    if message is not None:
+                        self.__remember(str(message["data"], encoding="utf-8"))
+            except Exception as error:
+                logger.error("Error listening for revoked tokens: %s.", error)
+            finally:
+                await pubsub.aclose()
+            pubsub = await self.__resubscribe()
+
+    async def __rebuild(self) -> None:
+        while True:
+            await asyncio.sleep(self.__settings.revocation_rebuild_interval_in_seconds)
+            try:
+                await self.load()
+            except Exception:
+                continue
+
+    async def close(self) -> None:
+        """
+        Stop the background tasks.
+
+        The clients are owned and closed by the application lifespan.
+        """
+        for task in self.__tasks:
+            task.cancel()
+
+    async def revoke(self, jti: str, expires_at: int) -> None:
+        """
+        Revoke a token until its expiry.
+
+        Args:
+            jti (str): The id of the token.
+            expires_at (int): The expiry timestamp of the token.
+        """
+        if expires_at <= self._now():
+            return
+        self.__remember(jti)
+        try:
+            await self.__redis.zadd(self.key, {jti: expires_at})
+            await self.__pubsub_redis.publish(self.__settings.revocation_channel, jti)
+        except Exception as error:
+            logger.error("Error revoking token `%s`: %s.", jti, error)
+            raise
+
+    async def is_revoked(self, jti: str) -> bool:
+        """
+        Check whether a token is revoked.
+
+        Args:
+            jti (str): The id of the token.
+
+        Returns:
+            True if the token is revoked and not yet expired.
+        """
+        if jti not in self.__filter:
+            return False
+        try:
+            expires_at = await self.__redis.zscore(self.key, jti)
+        except Exception as error:
+            logger.error("Error checking token `%s`: %s.", jti, error)
+            raise
+        return expires_at is not None and expires_at > self._now()
+
+
+class MemoryRevocationList(RevocationList):
+    """
+    Denylist of revoked access tokens kept in the worker.
+
+    It is used with CACHE_BACKEND=memory, when the application runs without
+    Redis. Revocations are not shared between workers, so, like
+    MemoryCache, it suits tests, benchmarks and single-worker deployments
+    only. Expired entries are dropped whenever the list reaches
+    revocation_capacity.
+
+    Args:
+        settings (CacheSettings): The revocation settings.
+    """
+
+    def __init__(self, settings: CacheSettings):
+        self.__settings = settings
+        self.__revoked: dict[str, int] = {}
+
+    async def load(self) -> None:
+        """
+        Drop expired entries.
+        """
+        now = self._now()
+        self.__revoked = {
+            jti: expires_at
+            for jti, expires_at in self.__revoked.items()
+            if expires_at > now
+        }
+
+    async def subscribe(self) -> None:
+        """
+        Do nothing: there are no other workers to follow.
+        """
+
+    async def close(self) -> None:
+        """
+        Drop all entries.
+        """
+        self.__revoked.clear()
+
+    async def revoke(self, jti: str, expires_at: int) -> None:
+        """
+        Revoke a token until its expiry.
+
+        Args:
+            jti (str): The id of the token.
+            expires_at (int): The expiry timestamp of the token.
+        """
+        if expires_at <= self._now():
+            return
+        if len(self.__revoked) >= self.__settings.revocation_capacity:
+            await self.load()
+        self.__revoked[jti] = expires_at
+
+    async def is_revoked(self, jti: str) -> bool:
+        """
+        Check whether a token is revoked.
+
+        Args:
+            jti (str): The id of the token.
+
+        Returns:
+            True if the token is revoked and not yet expired.
+        """
+        return self.__revoked.get(jti, 0) > self._now()
+
+
+revocation_list: RevocationList | None = None
+
+
+async def get_revocation_list() -> RevocationList | None:
+    return revocation_list
@@ -0,0 +1,151 @@
+# Lua scripts executed atomically on the Redis server by RedisCache.
+# Every script works with two keys of the user:
+#   KEYS[1] - session index: a sorted set of session ids scored by expiry;
+#   KEYS[2] - session metadata: a hash of session id -> SessionInfo JSON.
+# A session id is the digest of the refresh token, see token_digest.
+# A session is scored by its expiry timestamp with the fraction of the second
+# it was created or extended in, so the sessions of the same second keep their
+# order and the oldest one is evicted first, as in MemoryCache.
+# All keys of a user carry the same {user_uuid} hash tag, so in Redis Cluster
+# they are stored in one slot and every script runs on a single node.
+
+# ARGV[2] - current timestamp with the fraction of the second
+_PURGE_EXPIRED = """
+local expired = redis.call("ZRANGEBYSCORE", KEYS[1], "-inf", ARGV[2])
+if #expired > 0 then
+    redis.call("ZREMRANGEBYSCORE", KEYS[1], "-inf", ARGV[2])
+    redis.call("HDEL", KEYS[2], unpack(expired))
+end
+"""
+
+# ARGV[3] - session TTL in seconds
+# ARGV[4] - maximum number of sessions per user
+# new_session - id of the session just added, which is never evicted
+_EVICT_OLDEST = """
+local overflow = redis.call("ZCARD", KEYS[1]) - tonumber(ARGV[4])
+if overflow > 0 then
+    local evicted = {}
+    for _, member in ipairs(redis.call("ZRANGE", KEYS[1], 0, overflow)) do
+        if member ~= new_session and #evicted < overflow then
+            table.insert(evicted, member)
+        end
+    end
+    redis.call("ZREM", KEYS[1], unpack(evicted))
+    redis.call("HDEL", KEYS[2], unpack(evicted))
+end
+redis.call("EXPIRE", KEYS[1], ARGV[3])
+redis.call("EXPIRE", KEYS[2], ARGV[3])
+"""
+
+# ARGV[1] - session id
+# ARGV[5] - SessionInfo JSON of the new session
+SET_TOKEN = (
+    _PURGE_EXPIRED
+    + """
+local new_session = ARGV[1]
+local session = cjson.decode(ARGV[5])
+local clock = tonumber(ARGV[2])
+local score = session["exp"] + clock - math.floor(clock)
+redis.call("ZADD", KEYS[1], score, new_session)
+redis.call("HSET", KEYS[2], new_session, ARGV[5])
+"""
+    + _EVICT_OLDEST
+)
+
+# ARGV[1] - session id being rotated
+# ARGV[5] - session id of the new session
+# ARGV[6] - "1" to extend the session by the TTL, "0" to keep its expiry
+# ARGV[7] - absolute session lifetime in seconds counted from the issue
+#           time, 0 for no limit
+# ARGV[8] - grace period in seconds during which the rotated token keeps
+#           resolving to the new one, 0 to disable
+# ARGV[9] - the new refresh token, kept for the grace period
+# KEYS[3] - grace record of the rotated session: the id of the new session,
+#           the new refresh token and the role
+# Returns a JSON with the role of the session and 0 if the old token is
+# unknown or the session reached its absolute lifetime. When the old token
+# was already rotated within the grace period and the new session is still
+# live, the JSON carries the new refresh token as well. The new session
+# keeps the issue time, the client and the role of the rotated one.
+ROTATE_TOKEN = (
+    _PURGE_EXPIRED
+    + """
+local old = ARGV[1]
+local expires_at = redis.call("ZSCORE", KEYS[1], old)
+if not expires_at then
+    local grace = redis.call("GET", KEYS[3])
+    if grace then
+        grace = cjson.decode(grace)
+        if redis.call("ZSCORE", KEYS[1], grace["sid"]) then
+            return cjson.encode({refresh = grace["refresh"], role = grace["role"]})
+        end
+    end
+    return 0
+end
+local clock = tonumber(ARGV[2])
+local now = math.floor(clock)
+local session = {iat = now}
+local raw = redis.call("HGET", KEYS[2], old)
+if raw then
+    session = cjson.decode(raw)
+end
+redis.call("ZREM", KEYS[1], old)
+redis.call("HDEL", KEYS[2], old)
+local score = tonumber(expires_at)
+if ARGV[6] == "1" then
+    score = clock + tonumber(ARGV[3])
+end
+local lifetime = tonumber(ARGV[7])
+if lifetime > 0 then
+    score = math.min(score, session["iat"] + lifetime)
+end
+session["exp"] = math.floor(score)
+if session["exp"] <= now then
+    return 0
+end
+session["lu"] = now
+local new_session = ARGV[5]
+redis.call("ZADD", KEYS[1], score, new_session)
+redis.call("HSET", KEYS[2], new_session, cjson.encode(session))
+"""
+    + _EVICT_OLDEST
+    + """
+if tonumber(ARGV[8]) > 0 then
+    local grace = {sid = ARGV[5], refresh = ARGV[9], role = session["role"]}
+    redis.call("SET", KEYS[3], cjson.encode(grace), "EX", ARGV[8])
+end
+return cjson.encode({role = session["role"]})
+"""
+)
+
+# ARGV[1] - session id of the presented refresh token
+# ARGV[3] - "1" to delete all the sessions of the user, "0" for this one
+# Returns 1 if the session was live and the sessions were deleted, 0 if the
+# token has no live session and nothing was deleted.
+DELETE_SESSIONS = (
+    _PURGE_EXPIRED
+    + """
+if not redis.call("ZSCORE", KEYS[1], ARGV[1]) then
+    return 0
+end
+if ARGV[3] == "1" then
+    redis.call("DEL", KEYS[1], KEYS[2])
+else
+    redis.call("ZREM", KEYS[1], ARGV[1])
+    redis.call("HDEL", KEYS[2], ARGV[1])
+end
+return 1
+"""
+)
+
+# KEYS[1] - key of a session stored before the session index: the user UUID
+#           and the full refresh token
+# Deletes the key and returns its remaining TTL in seconds, or -2 if there
+# was no such session. Only one of concurrent callers gets the TTL.
+TAKE_LEGACY_SESSION = """
+local ttl = redis.call("TTL", KEYS[1])
+if redis.call("DEL", KEYS[1]) == 1 then
+    return ttl
+end
+return -2
+"""
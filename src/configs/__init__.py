@@ -2,10 +2,13 @@ from logging import config as logging_config
 
 from async_fastapi_jwt_auth import AuthJWT
 
+from src.configs.admission import AdmissionSettings
+from src.configs.cache import CacheSettings
 from src.configs.jeager import JaegerSettings
 from src.configs.logger import LOGGING
 from src.configs.notifications_api import NotificationApiSettings
 from src.configs.oauth2_google import Oauth2GoogleSettings
+from src.configs.password import PasswordSettings
 from src.configs.postgres import PostgresSettings
 from src.configs.redis import RedisSettings
 from src.configs.sentry import SentrySettings
@@ -21,6 +24,9 @@ __all__ = [
     "StartUpSettings",
     "Oauth2GoogleSettings",
     "TokenSettings",
+    "CacheSettings",
+    "PasswordSettings",
+    "AdmissionSettings",
     # "RedisSettings",
 ]
 
@@ -43,8 +49,11 @@ class Settings(EnvSettings):
     app: AppSettings = AppSettings()
     start_up: StartUpSettings = StartUpSettings()
     token: TokenSettings = TokenSettings()
+    password: PasswordSettings = PasswordSettings()
+    admission: AdmissionSettings = AdmissionSettings()
     postgres: PostgresSettings = PostgresSettings()
     redis: RedisSettings = RedisSettings()
+    cache: CacheSettings = CacheSettings()
     oauth2: Oauth2Settings = Oauth2Settings()
     jaeger: JaegerSettings = JaegerSettings()
     third_party_api: ThirdPartyApiSettings = ThirdPartyApiSettings()
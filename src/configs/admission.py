@@ -0,0 +1,23 @@
+from pydantic import Field
+
+from src.utils.settings import EnvSettings
+
+
+class AdmissionSettings(EnvSettings):
+    """
+    This class is used to store the admission control settings of login
+    and registration.
+
+    At most max_concurrency requests run at once per worker and at most
+    max_queue wait for a slot, for no longer than max_wait_in_seconds.
+    The rest are rejected with 503 and a Retry-After of
+    retry_after_in_seconds.
+    """
+
+    enabled: bool = Field(default=True, alias="ADMISSION_ENABLED")
+    max_concurrency: int = Field(default=8, alias="ADMISSION_MAX_CONCURRENCY")
+    max_queue: int = Field(default=32, alias="ADMISSION_MAX_QUEUE")
+    max_wait_in_seconds: float = Field(default=2, alias="ADMISSION_MAX_WAIT_IN_SECONDS")
+    retry_after_in_seconds: int = Field(
+        default=1, alias="ADMISSION_RETRY_AFTER_IN_SECONDS"
+    )
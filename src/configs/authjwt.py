@@ -1,13 +1,84 @@
-from pydantic import Field
+from typing import Literal
+
+from pydantic import Field, field_validator, model_validator
 
 from src.utils.settings import EnvSettings
 
 
 class AuthJWTSettings(EnvSettings):
-    authjwt_secret_key: str = Field(..., alias="AUTHJWT_SECRET_KEY")
+    """
+    This class is used to store the JWT settings.
+
+    HS* algorithms sign with AUTHJWT_SECRET_KEY. Asymmetric algorithms
+    (RS256, ES256, EdDSA, ...) sign with the PEM encoded AUTHJWT_PRIVATE_KEY
+    and publish AUTHJWT_PUBLIC_KEY in the JWKS, so other services can verify
+    tokens locally.
+
+    AUTHJWT_PREVIOUS_KEYS is a JSON list of the secrets or public keys that
+    signed before the current one. Tokens carry the id of their key in the
+    "kid" header, so the tokens of a previous key stay valid until they
+    expire and the key can be rotated without logging everyone out.
+    """
+
+    authjwt_secret_key: str | None = Field(default=None, alias="AUTHJWT_SECRET_KEY")
+    authjwt_private_key: str | None = Field(default=None, alias="AUTHJWT_PRIVATE_KEY")
+    authjwt_public_key: str | None = Field(default=None, alias="AUTHJWT_PUBLIC_KEY")
+    authjwt_previous_keys: list[str] = Field(default=[], alias="AUTHJWT_PREVIOUS_KEYS")
     authjwt_algorithm: str = Field(default="HS256", alias="AUTHJWT_ALGORITHM")
+    authjwt_access_token_expires: int = Field(
+        default=900, alias="AUTHJWT_ACCESS_TOKEN_EXPIRES"
+    )
     authjwt_token_location: set[str] = Field(default={"cookies"})
     authjwt_cookie_csrf_protect: bool = Field(
         default=True, alias="AUTHJWT_COOKIE_CSRF_PROTECT"
     )
     authjwt_cookie_secure: bool = Field(default=True, alias="AUTHJWT_COOKIE_SECURE")
+    authjwt_cookie_samesite: Literal["strict", "lax", "none"] = Field(
+        default="lax", alias="AUTHJWT_COOKIE_SAMESITE"
+    )
+    authjwt_cookie_max_age: int | None = Field(
+        default=None, alias="AUTHJWT_COOKIE_MAX_AGE"
+    )
+    authjwt_cookie_domain: str | None = Field(
+        default=None, alias="AUTHJWT_COOKIE_DOMAIN"
+    )
+    jwks_max_age_in_seconds: int = Field(default=3600, alias="JWKS_MAX_AGE_IN_SECONDS")
+
+    @staticmethod
+    def _unescape_pem(key: str) -> str:
+        if key.startswith("-----BEGIN"):
+            return key.replace("\\n", "\n")
+        return key
+
+    @field_validator("authjwt_private_key", "authjwt_public_key")
+    @classmethod
+    def unescape_pem(cls, value: str | None) -> str | None:
+        return cls._unescape_pem(value) if value else value
+
+    @field_validator("authjwt_previous_keys")
+    @classmethod
+    def unescape_previous_pem(cls, value: list[str]) -> list[str]:
+        return [cls._unescape_pem(key) for key in value]
+
+    @model_validator(mode="after")
+    def check_keys(self) -> "AuthJWTSettings":
+        if not self.is_asymmetric:
+            if not self.authjwt_secret_key:
+                raise ValueError("AUTHJWT_SECRET_KEY is required for HS algorithms")
+        elif not (self.authjwt_private_key and self.authjwt_public_key):
+            raise ValueError(
+                "AUTHJWT_PRIVATE_KEY and AUTHJWT_PUBLIC_KEY are required "
+                "for asymmetric algorithms"
+            )
+        return self
+
+    @property
+    def is_asymmetric(self) -> bool:
+        return not self.authjwt_algorithm.startswith("HS")
+
+    @property
+    def verification_key(self) -> str:
+        key = self.authjwt_public_key if self.is_asymmetric else self.authjwt_secret_key
+        if not key:
+            raise ValueError("The verification key of the algorithm is not set")
+        return key
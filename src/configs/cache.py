@@ -0,0 +1,26 @@
+from typing import Literal
+
+from pydantic import Field
+
+from src.utils.settings import EnvSettings
+
+
+class CacheSettings(EnvSettings):
+    """
+    This class is used to store the session cache settings.
+    """
+
+    backend: Literal["redis", "memory"] = Field(default="redis", alias="CACHE_BACKEND")
+    bulk_batch_size: int = Field(default=1000, alias="CACHE_BULK_BATCH_SIZE")
+    bulk_max_users: int = Field(default=10000, alias="CACHE_BULK_MAX_USERS")
+    revocation_channel: str = Field(
+        default="tokens:revoked", alias="REVOCATION_CHANNEL"
+    )
+    revocation_capacity: int = Field(default=100000, alias="REVOCATION_CAPACITY")
+    revocation_error_rate: float = Field(default=0.0001, alias="REVOCATION_ERROR_RATE")
+    revocation_rebuild_interval_in_seconds: float = Field(
+        default=300, alias="REVOCATION_REBUILD_INTERVAL_IN_SECONDS"
+    )
+    revocation_resubscribe_interval_in_seconds: float = Field(
+        default=1, alias="REVOCATION_RESUBSCRIBE_INTERVAL_IN_SECONDS"
+    )
@@ -0,0 +1,41 @@
+from typing import Literal
+
+from pydantic import Field
+
+from src.utils.settings import EnvSettings
+
+
+class PasswordSettings(EnvSettings):
+    """
+    This class is used to store the password hashing settings.
+
+    The hash policy is the algorithm and its cost: the n, r and p of scrypt
+    or the hash and the iterations of pbkdf2. A stored hash made with
+    another policy is upgraded in the background on the next successful
+    login when rehash_on_login is enabled.
+    """
+
+    hash_executor: Literal["inline", "thread", "process"] = Field(
+        default="thread", alias="PASSWORD_HASH_EXECUTOR"
+    )
+    hash_workers: int = Field(default=4, alias="PASSWORD_HASH_WORKERS")
+    hash_max_pending: int = Field(default=64, alias="PASSWORD_HASH_MAX_PENDING")
+    hash_algorithm: Literal["scrypt", "pbkdf2"] = Field(
+        default="scrypt", alias="PASSWORD_HASH_ALGORITHM"
+    )
+    scrypt_n: int = Field(default=32768, alias="PASSWORD_SCRYPT_N")
+    scrypt_r: int = Field(default=8, alias="PASSWORD_SCRYPT_R")
+    scrypt_p: int = Field(default=1, alias="PASSWORD_SCRYPT_P")
+    pbkdf2_hash_name: str = Field(default="sha256", alias="PASSWORD_PBKDF2_HASH_NAME")
+    pbkdf2_iterations: int = Field(default=600000, alias="PASSWORD_PBKDF2_ITERATIONS")
+    salt_length: int = Field(default=16, alias="PASSWORD_SALT_LENGTH")
+    rehash_on_login: bool = Field(default=True, alias="PASSWORD_REHASH_ON_LOGIN")
+
+    @property
+    def hash_method(self) -> str:
+        """
+        The werkzeug method string of the policy, as stored in the hashes.
+        """
+        if self.hash_algorithm == "scrypt":
+            return f"scrypt:{self.scrypt_n}:{self.scrypt_r}:{self.scrypt_p}"
+        return f"pbkdf2:{self.pbkdf2_hash_name}:{self.pbkdf2_iterations}"
@@ -1,6 +1,8 @@
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import Field
+from redis.asyncio import BlockingConnectionPool, Redis, RedisCluster, Sentinel
+from redis.asyncio.cluster import ClusterNode
 
 from src.utils.settings import ServiceSettings
 
@@ -8,16 +10,129 @@ from src.utils.settings import ServiceSettings
 class RedisSettings(ServiceSettings):
     """
     This class is used to store the REDIS connection settings.
+
+    In the cluster and sentinel modes REDIS_NODES lists the cluster startup
+    nodes or the sentinels as "host:port" strings; when it is empty the
+    host and port of the standalone mode are used.
+
+    REDIS_SHARDS lists independent Redis instances as "host:port" strings
+    to shard the sessions across; the other data stays on the main client.
     """
 
     host: str = Field(..., alias="REDIS_HOST")
     port: int = Field(..., alias="REDIS_PORT")
     host_local: str = Field(default="localhost", alias="REDIS_HOST_LOCAL")
     port_local: int = Field(default=6379, alias="REDIS_PORT_LOCAL")
+    mode: Literal["standalone", "cluster", "sentinel"] = Field(
+        default="standalone", alias="REDIS_MODE"
+    )
+    nodes: list[str] = Field(default=[], alias="REDIS_NODES")
+    shards: list[str] = Field(default=[], alias="REDIS_SHARDS")
+    sentinel_master: str = Field(default="mymaster", alias="REDIS_SENTINEL_MASTER")
+    max_connections: int = Field(default=50, alias="REDIS_MAX_CONNECTIONS")
+    pool_timeout: int = Field(default=5, alias="REDIS_POOL_TIMEOUT")
+    socket_timeout: float = Field(default=5, alias="REDIS_SOCKET_TIMEOUT")
+    socket_connect_timeout: float = Field(
+        default=5, alias="REDIS_SOCKET_CONNECT_TIMEOUT"
+    )
+    socket_keepalive: bool = Field(default=True, alias="REDIS_SOCKET_KEEPALIVE")
+    health_check_interval: int = Field(default=30, alias="REDIS_HEALTH_CHECK_INTERVAL")
+
+    @property
+    def socket_dict(self) -> dict[str, Any]:
+        return {
+            "socket_timeout": self.socket_timeout,
+            "socket_connect_timeout": self.socket_connect_timeout,
+            "socket_keepalive": self.socket_keepalive,
+            "health_check_interval": self.health_check_interval,
+        }
 
     @property
     def connection_dict(self) -> dict[str, Any]:
         return {
             "host": self.correct_host(),
             "port": self.correct_port(),
+            **self.socket_dict,
         }
+
+    @property
+    def node_addresses(self) -> list[tuple[str, int]]:
+        if not self.nodes:
+            return [(self.correct_host(), self.correct_port())]
+        return self._parse_addresses(self.nodes)
+
+    @staticmethod
+    def _parse_addresses(nodes: list[str]) -> list[tuple[str, int]]:
+        addresses = []
+        for node in nodes:
+            host, port = node.rsplit(":", 1)
+            addresses.append((host, int(port)))
+        return addresses
+
+    def create_pool(
+        self, host: str | None = None, port: int | None = None
+    ) -> BlockingConnectionPool:
+        """
+        Create the connection pool shared by every Redis client of a worker.
+
+        When all connections are busy, a command waits up to pool_timeout for
+        a free one instead of opening a new connection.
+        """
+        return BlockingConnectionPool(
+            max_connections=self.max_connections,
+            timeout=self.pool_timeout,
+            **{
+                **self.connection_dict,
+                "host": host or self.correct_host(),
+                "port": port or self.correct_port(),
+            },
+        )
+
+    def create_client(self) -> Redis | RedisCluster:
+        """
+        Create the Redis client shared by a worker for the configured mode.
+        """
+        if self.mode == "cluster":
+            host, port = self.node_addresses[0]
+            return RedisCluster.from_url(
+                f"redis://{host}:{port}",
+                startup_nodes=[
+                    ClusterNode(host, port) for host, port in self.node_addresses[1:]
+                ],
+                max_connections=self.max_connections,
+                **self.socket_dict,
+            )
+        if self.mode == "sentinel":
+            sentinel = Sentinel(self.node_addresses, **self.socket_dict)
+            return sentinel.master_for(
+                self.sentinel_master, max_connections=self.max_connections
+            )
+        return Redis.from_pool(self.create_pool())
+
+    def create_shard_clients(self) -> list[Redis]:
+        """
+        Create a client with its own connection pool for every shard.
+        """
+        return [
+            Redis.from_pool(self.create_pool(host, port))
+            for host, port in self._parse_addresses(self.shards)
+        ]
+
+    def create_pubsub_client(self) -> Redis:
+        """
+        Create the client of the pub/sub channels.
+
+        A subscription holds its connection for the life of the worker, so
+        the client has connections of its own rather than taking one of the
+        shared pool. A cluster client cannot subscribe, so in the cluster
+        mode the client connects to one of the nodes; messages are broadcast
+        cluster-wide. In the sentinel mode it connects to the master.
+        """
+        if self.mode == "sentinel":
+            sentinel = Sentinel(self.node_addresses, **self.socket_dict)
+            return sentinel.master_for(self.sentinel_master)
+        if self.mode == "cluster":
+            host, port = self.node_addresses[0]
+        else:
+            host, port = self.correct_host(), self.correct_port()
+        return Redis(host=host, port=port, **self.socket_dict)
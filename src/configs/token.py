@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import Field
 
 from src.configs.authjwt import AuthJWTSettings
@@ -6,3 +8,33 @@ from src.configs.authjwt import AuthJWTSettings
 class TokenSettings(AuthJWTSettings):
     expire_time_in_minutes: int = Field(..., alias="TOKEN_EXPIRE_TIME_IN_MINUTES")
     user_max_sessions: int = Field(..., alias="USER_MAX_SESSIONS")
+    accept_legacy_session_keys: bool = Field(
+        default=False, alias="ACCEPT_LEGACY_SESSION_KEYS"
+    )
+    sliding_expiry: bool = Field(default=True, alias="TOKEN_SLIDING_EXPIRY")
+    absolute_expire_time_in_minutes: int = Field(
+        default=0, alias="TOKEN_ABSOLUTE_EXPIRE_TIME_IN_MINUTES"
+    )
+    refresh_grace_period_in_seconds: int = Field(
+        default=10, alias="TOKEN_REFRESH_GRACE_PERIOD_IN_SECONDS"
+    )
+    decode_cache_max_size: int = Field(
+        default=10000, alias="TOKEN_DECODE_CACHE_MAX_SIZE"
+    )
+    opaque_refresh_tokens: bool = Field(default=False, alias="OPAQUE_REFRESH_TOKENS")
+    signing_executor: Literal["inline", "thread", "process"] = Field(
+        default="inline", alias="TOKEN_SIGNING_EXECUTOR"
+    )
+    signing_workers: int = Field(default=2, alias="TOKEN_SIGNING_WORKERS")
+    signing_max_pending: int = Field(default=64, alias="TOKEN_SIGNING_MAX_PENDING")
+    verify_batch_max_size: int = Field(default=100, alias="TOKEN_VERIFY_BATCH_MAX_SIZE")
+    # batch verification requests per second allowed to one client
+    verify_batch_rate_limit: int = Field(
+        default=50, alias="TOKEN_VERIFY_BATCH_RATE_LIMIT"
+    )
+    permission_claims: Literal["none", "names", "bitmask"] = Field(
+        default="none", alias="TOKEN_PERMISSION_CLAIMS"
+    )
+    permission_cache_ttl_in_seconds: float = Field(
+        default=60, alias="TOKEN_PERMISSION_CACHE_TTL_IN_SECONDS"
+    )
@@ -1,11 +1,9 @@
 import uuid
 from typing import TYPE_CHECKING
 
-from pydantic import SecretStr
 from sqlalchemy import Boolean, ForeignKey, String, false
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from werkzeug.security import check_password_hash, generate_password_hash
 
 from src.db.entities import Entity
 
@@ -43,18 +41,16 @@ class User(Entity):
     def __init__(
         self,
         email: str,
-        password: SecretStr,
+        password: str,
         first_name: str,
         last_name: str,
         role_uuid: uuid.UUID,
         is_superuser: bool = False,
     ) -> None:
         self.email = email
-        self.password = generate_password_hash(password.get_secret_value())
+        # The hash of the password, see PasswordHasher
+        self.password = password
         self.first_name = first_name
         self.last_name = last_name
         self.role_uuid = role_uuid
         self.is_superuser = is_superuser
-
-    def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password, password)
@@ -1,6 +1,8 @@
 from functools import lru_cache
+from uuid import UUID
 
 from fastapi import Depends
+from sqlalchemy import select
 
 from src.models.api.v1.permissions import (
     RequestPermissionCreate,
@@ -10,7 +12,7 @@ from src.db.clients.postgres import (
     PostgresDatabase,
     get_postgres_db,
 )
-from src.db.entities import Permission
+from src.db.entities import Permission, RolePermission
 from src.db.repositories.base import PostgresRepository
 
 
@@ -21,7 +23,25 @@ class PermissionRepository(
         RequestPermissionUpdate,
     ],
 ):
-    pass
+    async def get_catalog(self) -> list[str]:
+        async with self._database.get_session() as session:
+            names = await session.execute(
+                select(Permission.name).order_by(Permission.created_at, Permission.name)
+            )
+            return list(names.scalars().all())
+
+    async def get_names_by_role(self, role_uuid: UUID) -> list[str]:
+        async with self._database.get_session() as session:
+            names = await session.execute(
+                select(Permission.name)
+                .join(
+                    RolePermission,
+                    RolePermission.permission_uuid == Permission.uuid,
+                )
+                .where(RolePermission.role_uuid == role_uuid)
+                .order_by(Permission.name)
+            )
+            return list(names.scalars().all())
 
 
 @lru_cache
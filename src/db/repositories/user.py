@@ -1,9 +1,9 @@
 from functools import lru_cache
-from typing import Any, TypeVar
+from typing import Any, AsyncIterator, TypeVar
 from uuid import UUID
 
 from fastapi import Depends
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.orm import joinedload
 
 from src.configs import settings
@@ -16,6 +16,7 @@ from src.db.clients.postgres import (
 from src.db.entities import User, Entity
 from src.db.repositories.base import PostgresRepository
 from src.db.repositories.role import RoleRepository, get_role_repository
+from src.utils.passwords import password_hasher
 
 ModelType = TypeVar("ModelType", bound=Entity)
 
@@ -33,11 +34,13 @@ class UserRepository(
         self.role_repository = role_repository
 
     async def create(self, instance: RequestUserCreate) -> ModelType:
+        password = await password_hasher.hash(instance.password.get_secret_value())
         async with self._database.get_session() as session:
             role_uuid = await self.role_repository.get_uuid_filter_by(
                 name=settings.start_up.empty_role_name
             )
             create_dict = instance.dict()
+            create_dict["password"] = password
             create_dict["role_uuid"] = role_uuid
             db_obj = self._model(**create_dict)
             session.add(db_obj)
@@ -45,6 +48,11 @@ class UserRepository(
             await session.refresh(db_obj)
             return db_obj
 
+    async def get_by_email(self, email: str) -> User | None:
+        async with self._database.get_session() as session:
+            db_obj = await session.execute(select(User).filter_by(email=email))
+            return db_obj.scalars().first()
+
     async def get_with_role(self, user_uuid: UUID) -> Any | None:
         async with self._database.get_session() as session:
             db_obj = await session.execute(
@@ -59,14 +67,48 @@ class UserRepository(
     ) -> User | None:
         async with self._database.get_session() as session:
             user = await self.get(user_uuid)
-            if user.check_password(obj.current_password.get_secret_value()):
-                user.password = obj.new_password.get_secret_value()
+            if await password_hasher.verify(
+                user.password, obj.current_password.get_secret_value()
+            ):
+                user.password = await password_hasher.hash(
+                    obj.new_password.get_secret_value()
+                )
                 session.add(user)
                 await session.commit()
                 await session.refresh(user)
                 return user
             return None
 
+    async def update_password_hash(
+        self, user_uuid: UUID, old_hash: str, new_hash: str
+    ) -> bool:
+        """
+        Replace the password hash of a user unless it changed in the meantime.
+
+        Returns:
+            True if the hash was replaced.
+        """
+        async with self._database.get_session() as session:
+            result = await session.execute(
+                update(User)
+                .where(User.uuid == user_uuid, User.password == old_hash)
+                .values(password=new_hash)
+            )
+            await session.commit()
+            return bool(result.rowcount)
+
+    async def get_uuids_by_role(
+        self, role_uuid: UUID, batch_size: int
+    ) -> AsyncIterator[list[UUID]]:
+        async with self._database.get_session() as session:
+            result = await session.stream_scalars(
+                select(self._model.uuid)
+                .filter_by(role_uuid=role_uuid)
+                .execution_options(yield_per=batch_size)
+            )
+            async for partition in result.partitions(batch_size):
+                yield [UUID(str(user_uuid)) for user_uuid in partition]
+
     async def change_user_role(self, user_uuid: UUID, role_uuid: UUID) -> Any:
         async with self._database.get_session() as session:
             user = await self.get(user_uuid)
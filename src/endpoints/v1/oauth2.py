@@ -1,11 +1,11 @@
 from http import HTTPStatus
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Request, Response
 from fastapi.responses import RedirectResponse
-from fastapi_limiter.depends import RateLimiter
 
 from src.models.api.v1.base import StringRepresent
 from src.services.oauth2.google import OAuth2GoogleService, get_oauth2_google_service
+from src.utils.rate_limiter import RateLimiter
 
 router = APIRouter()
 
@@ -37,6 +37,7 @@ async def oauth_google_login(
 )
 async def google_auth(
     request: Request,
+    response: Response,
     oauth2_service: OAuth2GoogleService = Depends(get_oauth2_google_service),
 ) -> StringRepresent:
     """User authentication in the google auth service
@@ -48,6 +49,7 @@ async def google_auth(
     """
     await oauth2_service.login(
         request,
+        response,
         await oauth2_service.checkin_oauth_user(
             await oauth2_service.auth_via_google(request)
         ),
@@ -7,6 +7,7 @@ from src.models.api.v1.permissions import (
     RequestPermissionCreate,
     RequestPermissionUpdate,
     ResponsePermission,
+    ResponsePermissionCatalog,
     ResponsePermissionShort,
 )
 from src.auth.services.current_user import CurrentUserService, get_current_user
@@ -14,6 +15,7 @@ from src.auth.services.permission import (
     PermissionService,
     get_permission_service,
 )
+from src.auth.utils.permissions import PermissionClaims, get_permission_claims
 from src.validators.permission import (
     PermissionValidator,
     get_permission_validator,
@@ -55,6 +57,29 @@ async def get_permissions(
     ]
 
 
+@router.get(
+    "/catalog/",
+    response_model=ResponsePermissionCatalog,
+    summary="Get the permission catalog of the token bitmasks",
+)
+async def get_permission_catalog(
+    request: Request,
+    permission_claims: PermissionClaims = Depends(get_permission_claims),
+    current_user: CurrentUserService = Depends(get_current_user),
+) -> ResponsePermissionCatalog:
+    """Only available to administrator
+
+    Get the permissions in the order of the bits of the "perms" claim of the
+    access tokens, with the catalog version carried in their "pv" claim.
+    Gateways decoding the bitmask fetch it with an administrator account
+
+    Returns:
+    - **ResponsePermissionCatalog**: The version and the names of the permissions
+    """
+    await current_user.is_superuser(request)
+    return await permission_claims.get_catalog()
+
+
 @router.get(
     "/{permission_uuid}/",
     response_model=ResponsePermission,
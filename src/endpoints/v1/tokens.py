@@ -1,13 +1,24 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query, Request
-from fastapi_limiter.depends import RateLimiter
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
+from src.auth.configs import settings
 from src.auth.models.api.base import StringRepresent
-from src.auth.models.api.v1.tokens import RequestLogin
+from src.auth.models.api.v1.tokens import (
+    RequestLogin,
+    RequestSessionsRevoke,
+    RequestTokenVerifyBatch,
+    ResponseSessionsRevokeProgress,
+    ResponseTokenVerifyBatch,
+    ResponseWorkerStats,
+)
 from src.auth.models.api.v1.users import ResponseUser
+from src.auth.services.current_user import CurrentUserService, get_current_user
 from src.auth.services.token import TokenService, get_token_service
+from src.auth.utils.admission import credential_admission
+from src.auth.utils.rate_limiter import RateLimiter
 
 router = APIRouter()
 
@@ -16,11 +27,16 @@ router = APIRouter()
     "/login/",
     response_model=ResponseUser,
     summary="Issuing a JWT token",
-    dependencies=[Depends(RateLimiter(times=5, seconds=1))],
+    dependencies=[
+        Depends(RateLimiter(times=5, seconds=1)),
+        Depends(credential_admission),
+    ],
 )
 async def login(
     request: Request,
+    response: Response,
     body: RequestLogin,
+    background_tasks: BackgroundTasks,
     token_service: TokenService = Depends(get_token_service),
 ) -> ResponseUser:
     """Endpoint to receive JWT
@@ -30,7 +46,7 @@ async def login(
     Returns:
     - **StringRepresent**: Status code with message "The login was completed successfully"
     """
-    return await token_service.login(body, request)
+    return await token_service.login(body, request, response, background_tasks)
 
 
 @router.post(
@@ -73,6 +89,7 @@ async def logout(
 )
 async def refresh_token(
     request: Request,
+    response: Response,
     token_service: TokenService = Depends(get_token_service),
 ) -> StringRepresent:
     """Endpoint to refresh JWT
@@ -82,7 +99,7 @@ async def refresh_token(
     Returns:
     - **StringRepresent**: Status code with message "The refresh was completed successfully"
     """
-    await token_service.refresh(request)
+    await token_service.refresh(request, response)
     return StringRepresent(
         code=HTTPStatus.OK, details="The refresh was completed successfully"
     )
@@ -105,5 +122,80 @@ async def verify_token(
     Returns:
     - **StringRepresent**: Status code with message "The token is valid"
     """
-    token_service.verify(request)
+    await token_service.verify(request)
     return StringRepresent(code=HTTPStatus.OK, details="The token is valid")
+
+
+@router.post(
+    "/verify/batch/",
+    response_model=ResponseTokenVerifyBatch,
+    summary="verify many access tokens",
+    dependencies=[
+        Depends(RateLimiter(times=settings.token.verify_batch_rate_limit, seconds=1))
+    ],
+)
+async def verify_tokens(
+    body: RequestTokenVerifyBatch,
+    token_service: TokenService = Depends(get_token_service),
+) -> ResponseTokenVerifyBatch:
+    """Endpoint to verify many tokens at once
+
+    Verify access tokens passed in the body, for gateways fanning out to
+    several backends. A client may send TOKEN_VERIFY_BATCH_RATE_LIMIT
+    requests per second
+
+    Returns:
+    - **ResponseTokenVerifyBatch**: The validity and the claims of every token
+                                    in the order of the request
+    """
+    return await token_service.verify_batch(body)
+
+
+@router.post(
+    "/sessions/revoke/",
+    response_model=ResponseSessionsRevokeProgress,
+    summary="Revoke sessions of many users",
+)
+async def revoke_sessions(
+    request: Request,
+    body: RequestSessionsRevoke,
+    token_service: TokenService = Depends(get_token_service),
+    current_user: CurrentUserService = Depends(get_current_user),
+) -> StreamingResponse:
+    """Only available to administrator
+
+    Revoke all sessions of the listed users and of every user in the role
+
+    Returns:
+    - **ResponseSessionsRevokeProgress**: A stream of JSON lines with the number
+                                          of processed users, the last one has done=true,
+                                          or done=false and the error if the revocation failed
+    """
+    await current_user.is_superuser(request)
+    progress = token_service.revoke_sessions(body)
+    return StreamingResponse(
+        (f"{line.model_dump_json(exclude_none=True)}\n" async for line in progress),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get(
+    "/stats/",
+    response_model=ResponseWorkerStats,
+    summary="Get the token and password stats of the worker",
+)
+async def get_worker_stats(
+    request: Request,
+    token_service: TokenService = Depends(get_token_service),
+    current_user: CurrentUserService = Depends(get_current_user),
+) -> ResponseWorkerStats:
+    """Only available to administrator
+
+    Get the hit ratio of the token decode cache and the queue depths of the
+    token signer and the password hasher of the worker serving the request
+
+    Returns:
+    - **ResponseWorkerStats**: The stats of the worker
+    """
+    await current_user.is_superuser(request)
+    return token_service.get_worker_stats()
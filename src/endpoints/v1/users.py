@@ -1,7 +1,6 @@
 from http import HTTPStatus
 
 from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi_limiter.depends import RateLimiter
 
 from src.auth.models.api.base import StringRepresent
 from src.auth.models.api.v1.users import (
@@ -12,6 +11,8 @@ from src.auth.models.api.v1.users import (
 )
 from src.auth.services.current_user import CurrentUserService, get_current_user
 from src.auth.services.user import UserService, get_user_service
+from src.auth.utils.admission import credential_admission
+from src.auth.utils.rate_limiter import RateLimiter
 from src.auth.validators.user import (
     UserValidator,
     get_user_validator,
@@ -57,7 +58,10 @@ async def get_users(
     "/",
     response_model=ResponseUser,
     summary="Register the user",
-    dependencies=[Depends(RateLimiter(times=5, seconds=1))],
+    dependencies=[
+        Depends(RateLimiter(times=5, seconds=1)),
+        Depends(credential_admission),
+    ],
 )
 async def create_user(
     body: RequestUserCreate,
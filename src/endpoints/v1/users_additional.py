@@ -10,12 +10,14 @@ from src.auth.models.api.v1.login_history import (
 from src.auth.models.api.v1.users import ResponseUserExtended
 from src.auth.models.api.v1.users_additional import (
     RequestPasswordChange,
+    ResponseSession,
 )
 from src.auth.services.current_user import CurrentUserService, get_current_user
 from src.auth.services.login_history import (
     LoginHistoryService,
     get_login_history_service,
 )
+from src.auth.services.token import TokenService, get_token_service
 from src.auth.services.user import UserService, get_user_service
 from src.auth.utils.pagination import Paginator, get_paginator
 from src.auth.validators.role import (
@@ -185,3 +187,34 @@ async def change_user_role(
         await role_validator.is_exists(role_uuid),
     )
     return users
+
+
+@router.get(
+    "/{user_uuid}/sessions/",
+    response_model=list[ResponseSession],
+    summary="Get user active sessions",
+)
+async def get_user_sessions(
+    request: Request,
+    user_uuid: user_uuid_annotation,
+    token_service: TokenService = Depends(get_token_service),
+    current_user: CurrentUserService = Depends(get_current_user),
+) -> list[ResponseSession]:
+    """Available to the user himself and to administrator
+
+    Get user active sessions
+
+    Args:
+    - **user_uuid** (str): The UUID of the user to get active sessions
+
+    Returns:
+    - **list[ResponseSession]**: The device, IP address, issue and expiry time
+                                 of every active session
+    """
+    user = await current_user.get_me(request)
+    if user.uuid != user_uuid and not user.is_superuser:
+        raise HTTPException(
+            status_code=HTTPStatus.FORBIDDEN,
+            detail="You do not have sufficient permissions to perform this action.",
+        )
+    return await token_service.get_sessions(user_uuid)
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Response
+
+from src.auth.configs import settings
+from src.auth.models.api.v1.tokens import ResponseJWKS
+from src.auth.utils.keyring import key_ring
+
+router = APIRouter()
+
+
+@router.get(
+    "/jwks.json",
+    response_model=ResponseJWKS,
+    summary="Public keys of the JWT signature",
+)
+async def get_jwks(response: Response) -> ResponseJWKS:
+    """Endpoint to receive the JSON Web Key Set
+
+    Publishes the current and the previous public keys of the tokens, so
+    other services can verify them without calling the auth service. The set
+    is empty when the tokens are signed with a shared secret.
+
+    Returns:
+    - **ResponseJWKS**: The public keys in JWK format
+    """
+    max_age = settings.token.jwks_max_age_in_seconds
+    response.headers["Cache-Control"] = f"public, max-age={max_age}"
+    return ResponseJWKS(keys=key_ring.public_jwks())
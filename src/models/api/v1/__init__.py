@@ -7,6 +7,7 @@ from src.models.api.v1.permissions import (
     RequestPermissionUpdate,
     RequestPermissionCreate,
     ResponsePermission,
+    ResponsePermissionCatalog,
     ResponsePermissionShort,
     ResponsePermissionsPaginated,
 )
@@ -37,6 +38,7 @@ __all__ = [
     "RequestPermissionUpdate",
     "RequestPermissionCreate",
     "ResponsePermission",
+    "ResponsePermissionCatalog",
     "ResponsePermissionShort",
     "ResponsePermissionsPaginated",
     "RequestRolePermissionCreate",
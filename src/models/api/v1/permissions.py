@@ -55,3 +55,14 @@ class ResponsePermissionShort(UUIDMixin):
 
 class ResponsePermissionsPaginated(PaginatedMixin):
     permissions: list[ResponsePermissionShort]
+
+
+class ResponsePermissionCatalog(BaseModel):
+    version: str = Field(
+        description="Версия каталога разрешений",
+        examples=["1f2e3d4c5b6a7988"],
+    )
+    permissions: list[str] = Field(
+        description="Наименования разрешений в порядке битов маски",
+        examples=[["Новинки сериалов"]],
+    )
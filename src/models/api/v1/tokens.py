@@ -1,4 +1,7 @@
-from pydantic import BaseModel
+from typing import Any
+from uuid import UUID
+
+from pydantic import BaseModel, Field, model_validator
 
 from src.models.api.v1.base import LoginMixin, TokenMixin
 
@@ -22,3 +25,70 @@ class RequestTokenRefreshChecker(TokenMixin):
 
 class RequestTokenVerify(TokenMixin):
     access: str
+
+
+class RequestTokenVerifyBatch(BaseModel):
+    tokens: list[str] = Field(
+        min_length=1,
+        description="Проверяемые access токены",
+        examples=[["eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9..."]],
+    )
+
+
+class ResponseTokenVerification(BaseModel):
+    valid: bool = Field(description="Действителен ли токен")
+    claims: dict[str, Any] | None = Field(
+        default=None, description="Данные действительного токена"
+    )
+    detail: str | None = Field(
+        default=None, description="Причина, по которой токен недействителен"
+    )
+
+
+class ResponseTokenVerifyBatch(BaseModel):
+    results: list[ResponseTokenVerification] = Field(
+        description="Результаты проверки в порядке токенов запроса"
+    )
+
+
+class RequestSessionsRevoke(BaseModel):
+    user_uuids: list[UUID] = Field(
+        default=[],
+        description="UUID пользователей, чьи сессии отзываются",
+        examples=[["3fa85f64-5717-4562-b3fc-2c963f66afa6"]],
+    )
+    role_uuid: UUID | None = Field(
+        default=None,
+        description="UUID роли, у всех пользователей которой отзываются сессии",
+        examples=["6a0a479b-cfec-41ac-b520-41b2b007b611"],
+    )
+
+    @model_validator(mode="after")
+    def check_target(self) -> "RequestSessionsRevoke":
+        if not self.user_uuids and self.role_uuid is None:
+            raise ValueError("user_uuids or role_uuid must be provided")
+        return self
+
+
+class ResponseSessionsRevokeProgress(BaseModel):
+    revoked: int
+    done: bool
+    error: str | None = Field(
+        default=None, description="Причина, по которой отзыв прерван"
+    )
+
+
+class ResponseWorkerStats(BaseModel):
+    pid: int = Field(description="PID воркера, ответившего на запрос")
+    decode_cache: dict[str, int | float] = Field(
+        description="Кэш проверенных токенов: размер, попадания, промахи и их доля"
+    )
+    token_signer: dict[str, int] = Field(description="Очередь подписи токенов")
+    password_hasher: dict[str, int] = Field(description="Очередь хеширования паролей")
+
+
+class ResponseJWKS(BaseModel):
+    keys: list[dict[str, str]] = Field(
+        default=[],
+        description="Открытые ключи для проверки подписи JWT",
+    )
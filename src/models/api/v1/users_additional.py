@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel, Field, SecretStr
 
 from src.auth.models.api.base import UUIDMixin
@@ -21,3 +23,26 @@ class RequestPasswordChange(BaseModel):
         min_length=1,
         max_length=255,
     )
+
+
+class ResponseSession(BaseModel):
+    session_id: str = Field(
+        description="Идентификатор сессии",
+        examples=["xER0A41FnkDkcUr--nv42g"],
+    )
+    device: str | None = Field(
+        description="Устройство, с которого открыта сессия",
+        examples=["Mozilla/5.0 (X11; Linux x86_64)"],
+    )
+    ip_address: str | None = Field(
+        description="IP-адрес, с которого открыта сессия",
+        examples=["192.168.0.1"],
+    )
+    issued_at: datetime = Field(
+        description="Дата открытия сессии",
+        examples=["2024-04-19T17:17:31Z"],
+    )
+    expires_at: datetime = Field(
+        description="Дата истечения сессии",
+        examples=["2024-04-19T19:17:31Z"],
+    )
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class CacheTokens(BaseModel):
@@ -9,3 +9,19 @@ class CacheTokens(BaseModel):
 class UserClaims(BaseModel):
     user_uuid: str
     role_uuid: str
+
+
+class SessionInfo(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    issued_at: int = Field(alias="iat")
+    expires_at: int = Field(alias="exp")
+    last_used_at: int = Field(alias="lu")
+    device: str | None = Field(default=None, alias="dev")
+    ip_address: str | None = Field(default=None, alias="ip")
+    role_uuid: str | None = Field(default=None, alias="role")
+
+
+class RotatedSession(BaseModel):
+    refresh: str
+    role_uuid: str | None = None
@@ -1,11 +1,10 @@
 from http import HTTPStatus
 
-from async_fastapi_jwt_auth import AuthJWT
-from async_fastapi_jwt_auth.auth_jwt import AuthJWTBearer
 from fastapi import Depends, HTTPException, Request
 
+from src.cache.revocation import RevocationList, get_revocation_list
 from src.models.api.v1.users import ResponseUser
-from src.validators.token import validate_token
+from src.validators.token import get_request_claims
 from src.db.repositories.user import UserRepository, get_user_repository
 
 
@@ -13,28 +12,34 @@ class CurrentUserService:
     def __init__(
         self,
         user_repository: UserRepository,
-        authorize: AuthJWT,
+        revocation_list: RevocationList,
     ):
         self._user_repository = user_repository
-        self._authorize = authorize
+        self._revocation_list = revocation_list
 
     async def get_me(self, request: Request) -> ResponseUser:
-        token = request.cookies.get("access_token_cookie")
-        if not token:
-            raise HTTPException(
-                status_code=HTTPStatus.UNAUTHORIZED,
-                detail="No token",
-            )
-
-        user_uuid = validate_token(token).get("user_uuid")
+        """
+        Get the user of the access token of the request.
+
+        The token is verified and the user is loaded once per request and
+        kept on request.state, so an endpoint may check the user several
+        times at no extra cost.
+        """
+        if hasattr(request.state, "current_user"):
+            return request.state.current_user
+        raw_jwt = await get_request_claims(request, self._revocation_list)
+        user_uuid = raw_jwt.get("user_uuid")
         if not user_uuid:
             raise HTTPException(
                 status_code=HTTPStatus.NOT_FOUND, detail="user not found"
             )
         obj = await self._user_repository.get(user_uuid)
         if not obj:
-            return
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND, detail="user not found"
+            )
         model = ResponseUser.model_validate(obj, from_attributes=True)
+        request.state.current_user = model
         return model
 
     async def is_superuser(self, request: Request):
@@ -49,6 +54,6 @@ class CurrentUserService:
 
 def get_current_user(
     user_repository: UserRepository = Depends(get_user_repository),
-    authorize: AuthJWT = AuthJWTBearer(),
+    revocation_list: RevocationList = Depends(get_revocation_list),
 ) -> CurrentUserService:
-    return CurrentUserService(user_repository, authorize)
+    return CurrentUserService(user_repository, revocation_list)
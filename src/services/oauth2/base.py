@@ -5,11 +5,11 @@ from uuid import UUID
 from authlib.jose import JWTClaims
 
 from async_fastapi_jwt_auth import AuthJWT
-from fastapi import Request
+from fastapi import Request, Response
 
 from pydantic import SecretStr
 
-from src.cache.redis import RedisCache
+from src.cache.abstract import AbstractCache
 from src.db.entities import User
 from src.models.api.v1.login_history import RequestLoginHistory
 from src.models.api.v1.social_account import RequestCreateSocialAccount
@@ -24,7 +24,7 @@ from src.db.repositories.user import UserRepository
 class OAuth2BaseService:
     def __init__(
         self,
-        cache: RedisCache,
+        cache: AbstractCache,
         user_repository: UserRepository,
         history_repository: LoginHistoryRepository,
         social_account_repository: SocialAccountRepository,
@@ -79,8 +79,15 @@ class OAuth2BaseService:
             pass
         return user_claims
 
-    async def login(self, request: Request, user_claims: UserClaims) -> None:
-        await self._token.base_login(user_claims)
+    async def login(
+        self, request: Request, response: Response, user_claims: UserClaims
+    ) -> None:
+        await self._token.base_login(
+            user_claims,
+            response,
+            device=request.headers.get("User-Agent"),
+            ip_address=request.client.host if request.client else None,
+        )
         await self._history_repository.create(
             RequestLoginHistory(
                 user_uuid=UUID(user_claims.user_uuid),
@@ -9,7 +9,8 @@ from async_fastapi_jwt_auth import AuthJWT
 from async_fastapi_jwt_auth.auth_jwt import AuthJWTBearer
 from fastapi import Depends, HTTPException, Request
 
-from src.cache.redis import RedisCache, get_redis
+from src.cache.abstract import AbstractCache
+from src.cache.redis import get_redis
 from src.configs import Oauth2GoogleSettings
 
 from src.models.token import UserClaims
@@ -32,7 +33,7 @@ logger = logging.getLogger("GoogleOAuth2Service")
 class OAuth2GoogleService(OAuth2BaseService):
     def __init__(
         self,
-        cache: RedisCache,
+        cache: AbstractCache,
         client: Oauth2GoogleClient,
         user_repository: UserRepository,
         history_repository: LoginHistoryRepository,
@@ -74,7 +75,7 @@ class OAuth2GoogleService(OAuth2BaseService):
 
 @lru_cache
 def get_oauth2_google_service(
-    cache: RedisCache = Depends(get_redis),
+    cache: AbstractCache = Depends(get_redis),
     google_oauth2_client: Oauth2GoogleClient = Depends(get_oauth2_google_client),
     user_repository: UserRepository = Depends(get_user_repository),
     history_repository: LoginHistoryRepository = Depends(get_login_history_repository),
@@ -8,6 +8,7 @@ from src.models.api.v1.roles import RequestRoleCreate
 from src.models.api.v1.users import RequestUserCreate
 from src.db.clients.postgres import PostgresDatabase
 from src.db.entities import Role, User
+from src.utils.passwords import password_hasher
 
 logger = logging.getLogger("StartUpService")
 
@@ -64,9 +65,11 @@ class StartUpService:
             await session.commit()
 
     async def create_user(self, instance: RequestUserCreate) -> None:
+        password = await password_hasher.hash(instance.password.get_secret_value())
         async with self.__database.get_session() as session:
             role_uuid = await self.get_uuid_by_name(self.__settings.empty_role_name)
             instance_dict = instance.dict()
+            instance_dict["password"] = password
             instance_dict["is_superuser"] = True
             instance_dict["role_uuid"] = role_uuid
             db_obj = User(**instance_dict)
@@ -1,22 +1,52 @@
+import asyncio
+import logging
+import os
+
+from datetime import datetime, timezone
 from functools import lru_cache
 from http import HTTPStatus
+from typing import AsyncIterator
+from uuid import UUID
 
 from async_fastapi_jwt_auth import AuthJWT
 from async_fastapi_jwt_auth.auth_jwt import AuthJWTBearer
-from fastapi import Depends, HTTPException, Request
+from fastapi import BackgroundTasks, Depends, HTTPException, Request, Response
 
-from src.cache import RedisCache, get_redis
-from src.auth.models.api.v1.login_history import RequestLoginHistory
-from src.auth.models.api.v1.tokens import RequestLogin
-from src.auth.models.api.v1.users import ResponseUser
-from src.auth.models.db.token import UserClaims
+from src.cache.abstract import AbstractCache
+from src.cache.redis import get_redis
+from src.cache.revocation import RevocationList, get_revocation_list
+from src.configs import settings
+from src.models.api.v1.login_history import RequestLoginHistory
+from src.models.api.v1.tokens import (
+    RequestLogin,
+    RequestSessionsRevoke,
+    RequestTokenVerifyBatch,
+    ResponseSessionsRevokeProgress,
+    ResponseTokenVerification,
+    ResponseTokenVerifyBatch,
+    ResponseWorkerStats,
+)
+from src.models.api.v1.users import ResponseUser
+from src.models.api.v1.users_additional import ResponseSession
+from src.models.token import CacheTokens, UserClaims
+from src.utils.passwords import password_hasher
+from src.utils.signer import token_signer
 from src.utils.tokens import TokenUtils, get_token_utils
-from src.auth.validators.token import validate_token
-from src.auth.db.repositories import (
+from src.validators.token import (
+    check_revocation,
+    decode_cache_stats,
+    get_request_claims,
+    is_opaque_token,
+    validate_refresh_token,
+    validate_token,
+)
+from src.db.repositories.login_history import (
     LoginHistoryRepository,
     get_login_history_repository,
 )
-from src.auth.db.repositories import UserRepository, get_user_repository
+from src.db.repositories.user import UserRepository, get_user_repository
+
+logger = logging.getLogger("TokenService")
 
 auth_dep = AuthJWTBearer()
 
@@ -24,36 +54,54 @@ auth_dep = AuthJWTBearer()
 class TokenService:
     def __init__(
         self,
-        cache: RedisCache,
+        cache: AbstractCache,
         user_repository: UserRepository,
         history_repository: LoginHistoryRepository,
         authorize: AuthJWT,
         token: TokenUtils,
+        revocation_list: RevocationList,
     ):
         self._cache = cache
         self._user_repository = user_repository
         self._history_repository = history_repository
         self._authorize = authorize
         self._token = token
+        self._revocation_list = revocation_list
 
-    async def login(self, body: RequestLogin, request: Request) -> ResponseUser:
+    async def login(
+        self,
+        body: RequestLogin,
+        request: Request,
+        response: Response,
+        background_tasks: BackgroundTasks | None = None,
+    ) -> ResponseUser:
         user = await self._user_repository.get_by_email(body.email)
         if not user:
             raise HTTPException(
                 status_code=HTTPStatus.UNAUTHORIZED,
                 detail="The email is not valid",
             )
-        if not user.check_password(body.password.get_secret_value()):
+        if not await password_hasher.verify(
+            user.password, body.password.get_secret_value()
+        ):
             raise HTTPException(
                 status_code=HTTPStatus.UNAUTHORIZED,
                 detail="Bad username or password",
             )
+        if background_tasks and password_hasher.needs_rehash(user.password):
+            background_tasks.add_task(
+                self._rehash_password,
+                UUID(str(user.uuid)),
+                user.password,
+                body.password.get_secret_value(),
+            )
         user_data = UserClaims(user_uuid=str(user.uuid), role_uuid=str(user.role_uuid))
-        tokens = await self._token.create_tokens(user_data)
-
-        await self._token.set_tokens_to_cookies(tokens)
-        await self._token.delete_oldest_token(user.uuid)
-        await self._cache.set_token(user.uuid, tokens.refresh)
+        await self._token.base_login(
+            user_data,
+            response,
+            device=request.headers.get("User-Agent"),
+            ip_address=request.client.host if request.client else None,
+        )
 
         await self._history_repository.create(
             RequestLoginHistory(
@@ -65,6 +113,23 @@ class TokenService:
         model = ResponseUser.model_validate(user, from_attributes=True)
         return model
 
+    async def _rehash_password(
+        self, user_uuid: UUID, password_hash: str, password: str
+    ) -> None:
+        """
+        Upgrade a password hash to the current hash policy after a login.
+
+        Runs after the response is sent. The hash is only replaced if the
+        password was not changed in the meantime.
+        """
+        try:
+            new_hash = await password_hasher.hash(password)
+            await self._user_repository.update_password_hash(
+                user_uuid, password_hash, new_hash
+            )
+        except Exception as error:
+            logger.error("Error rehashing password of `%s`: %s.", user_uuid, error)
+
     async def logout(self, request: Request, for_all_sessions: bool):
         refresh_token = request.cookies.get("refresh_token_cookie")
         if not refresh_token:
@@ -72,63 +137,194 @@ class TokenService:
                 status_code=HTTPStatus.UNAUTHORIZED,
                 detail="No token",
             )
-        raw_jwt = validate_token(refresh_token)
+        raw_jwt = validate_refresh_token(refresh_token)
 
-        await self._cache.delete_tokens(
-            raw_jwt.get("user_uuid"),
+        deleted = await self._cache.delete_tokens(
+            raw_jwt["user_uuid"],
             refresh_token,
-            all=for_all_sessions,
+            all_tokens=for_all_sessions,
         )
+        # An opaque token proves nothing without its session, and ending all
+        # sessions takes a live one, whatever the kind of the token.
+        if not deleted and (for_all_sessions or is_opaque_token(refresh_token)):
+            raise HTTPException(
+                status_code=HTTPStatus.UNAUTHORIZED,
+                detail="The refresh token has no live session",
+            )
+        access_token = request.cookies.get("access_token_cookie")
+        if access_token:
+            await self.revoke_access_token(access_token)
         await self._token.unset_tokens_from_cookies(access=True, refresh=True)
 
-    async def refresh(self, request: Request):
+    async def revoke_access_token(self, token: str) -> None:
+        try:
+            raw_jwt = validate_token(token)
+        except HTTPException:
+            return
+        jti, exp = raw_jwt.get("jti"), raw_jwt.get("exp")
+        if jti and exp:
+            await self._revocation_list.revoke(jti, exp)
+
+    async def refresh(self, request: Request, response: Response):
         token = request.cookies.get("refresh_token_cookie")
         if not token:
             raise HTTPException(
                 status_code=HTTPStatus.UNAUTHORIZED,
                 detail="No token",
             )
-        raw_jwt = validate_token(token)
-        tokens = await self._cache.get_tokens(raw_jwt.get("user_uuid"))
-        if not tokens:
+        raw_jwt = validate_refresh_token(token)
+        user_uuid = raw_jwt["user_uuid"]
+        refresh_token = await self._token.create_refresh_token(
+            UserClaims(user_uuid=user_uuid, role_uuid=raw_jwt.get("role_uuid", ""))
+        )
+
+        session = await self._cache.rotate_token(user_uuid, token, refresh_token)
+        if not session:
             raise HTTPException(
                 status_code=HTTPStatus.UNAUTHORIZED,
                 detail="Fake token",
             )
-        current_refresh_tokens = [str(token, encoding=("utf-8")) for token in tokens]
-        if token not in current_refresh_tokens:
+        refresh_token = session.refresh
+        role_uuid = raw_jwt.get("role_uuid") or session.role_uuid
+        if role_uuid is None:
+            user = await self._user_repository.get(user_uuid)
+            if not user:
+                raise HTTPException(
+                    status_code=HTTPStatus.UNAUTHORIZED,
+                    detail="user not found",
+                )
+            role_uuid = str(user.role_uuid)
+        access_token = await self._token.create_access_token(
+            UserClaims(user_uuid=user_uuid, role_uuid=role_uuid)
+        )
+        await self._token.set_tokens_to_cookies(
+            CacheTokens(access=access_token, refresh=refresh_token), response
+        )
+
+    def revoke_sessions(
+        self, body: RequestSessionsRevoke
+    ) -> AsyncIterator[ResponseSessionsRevokeProgress]:
+        """
+        Revoke all sessions of the listed users and of every user in the role.
+
+        The users are processed in batches of bulk_batch_size, each removed
+        from the cache with one pipelined call, and the progress is reported
+        after every batch. The progress is streamed after the response status
+        is sent, so a failure ends the stream with a line holding the error
+        and done=false instead of done=true.
+
+        Raises:
+            HTTPException: 422 if more than bulk_max_users users are listed.
+        """
+        max_users = settings.cache.bulk_max_users
+        if len(body.user_uuids) > max_users:
             raise HTTPException(
-                status_code=HTTPStatus.UNAUTHORIZED,
-                detail="Fake token",
+                status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                detail=f"At most {max_users} users can be revoked at once",
             )
+        return self.__revoke_sessions(body)
 
-        user_data = UserClaims(
-            user_uuid=raw_jwt.get("user_uuid"),
-            role_uuid=raw_jwt.get("role_uuid"),
-        )
-        tokens = await self._token.create_tokens(user_data)
+    async def __revoke_sessions(
+        self, body: RequestSessionsRevoke
+    ) -> AsyncIterator[ResponseSessionsRevokeProgress]:
+        revoked = 0
+        try:
+            async for batch in self._revoke_batches(body):
+                await self._cache.delete_sessions(
+                    [str(user_uuid) for user_uuid in batch]
+                )
+                revoked += len(batch)
+                yield ResponseSessionsRevokeProgress(revoked=revoked, done=False)
+        except Exception as error:
+            logger.error("Error revoking sessions after %s users: %s.", revoked, error)
+            yield ResponseSessionsRevokeProgress(
+                revoked=revoked,
+                done=False,
+                error="The revocation was interrupted, retry the request",
+            )
+            return
+        yield ResponseSessionsRevokeProgress(revoked=revoked, done=True)
 
-        await self._token.set_tokens_to_cookies(tokens)
-        await self._cache.delete_tokens(user_data.user_uuid, token)
-        await self._cache.set_token(user_data.user_uuid, tokens.refresh)
+    async def _revoke_batches(
+        self, body: RequestSessionsRevoke
+    ) -> AsyncIterator[list[UUID]]:
+        batch_size = settings.cache.bulk_batch_size
+        for start in range(0, len(body.user_uuids), batch_size):
+            yield body.user_uuids[start : start + batch_size]
+        if body.role_uuid is not None:
+            async for batch in self._user_repository.get_uuids_by_role(
+                body.role_uuid, batch_size
+            ):
+                yield batch
 
-    @staticmethod
-    def verify(request: Request):
-        token = request.cookies.get("access_token_cookie")
-        if not token:
+    async def get_sessions(self, user_uuid: UUID) -> list[ResponseSession]:
+        sessions = await self._cache.get_sessions(str(user_uuid)) or {}
+        return [
+            ResponseSession(
+                session_id=session_id,
+                device=session.device,
+                ip_address=session.ip_address,
+                issued_at=datetime.fromtimestamp(session.issued_at, timezone.utc),
+                expires_at=datetime.fromtimestamp(session.expires_at, timezone.utc),
+            )
+            for session_id, session in sessions.items()
+        ]
+
+    async def verify(self, request: Request):
+        await get_request_claims(request, self._revocation_list)
+
+    async def verify_batch(
+        self, body: RequestTokenVerifyBatch
+    ) -> ResponseTokenVerifyBatch:
+        max_size = settings.token.verify_batch_max_size
+        if len(body.tokens) > max_size:
             raise HTTPException(
-                status_code=HTTPStatus.UNAUTHORIZED,
-                detail="No token",
+                status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                detail=f"At most {max_size} tokens can be verified at once",
             )
-        validate_token(token)
+        results = await asyncio.gather(
+            *(self.__verify_one(token) for token in body.tokens)
+        )
+        return ResponseTokenVerifyBatch(results=results)
+
+    async def __verify_one(self, token: str) -> ResponseTokenVerification:
+        try:
+            raw_jwt = validate_token(token)
+            await check_revocation(raw_jwt, self._revocation_list)
+        except HTTPException as error:
+            return ResponseTokenVerification(valid=False, detail=error.detail)
+        return ResponseTokenVerification(valid=True, claims=raw_jwt)
+
+    @staticmethod
+    def get_worker_stats() -> ResponseWorkerStats:
+        """
+        Get the stats of the worker serving the request.
+
+        The decode cache and the signing and hashing pools live in every
+        worker, so each worker reports its own.
+        """
+        return ResponseWorkerStats(
+            pid=os.getpid(),
+            decode_cache=decode_cache_stats(),
+            token_signer=token_signer.stats(),
+            password_hasher=password_hasher.stats(),
+        )
 
 
 @lru_cache
 def get_token_service(
-    cache: RedisCache = Depends(get_redis),
+    cache: AbstractCache = Depends(get_redis),
     user_repository: UserRepository = Depends(get_user_repository),
     history_repository: LoginHistoryRepository = Depends(get_login_history_repository),
     authorize: AuthJWT = Depends(auth_dep),
     token: TokenUtils = Depends(get_token_utils),
+    revocation_list: RevocationList = Depends(get_revocation_list),
 ) -> TokenService:
-    return TokenService(cache, user_repository, history_repository, authorize, token)
+    return TokenService(
+        cache,
+        user_repository,
+        history_repository,
+        authorize,
+        token,
+        revocation_list,
+    )
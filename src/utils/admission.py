@@ -0,0 +1,103 @@
+import asyncio
+import logging
+
+from http import HTTPStatus
+from typing import AsyncIterator
+
+from fastapi import HTTPException
+
+from src.configs import AdmissionSettings, settings
+
+logger = logging.getLogger("AdmissionController")
+
+
+class AdmissionController:
+    """
+    Limits the number of concurrent requests of an endpoint per worker.
+
+    Login and registration hash a password, which costs far more than any
+    other request. In a login storm their hashes queue up without bound and
+    every request of the worker times out, cheap token checks included. The
+    controller lets max_concurrency requests run at once and max_queue
+    wait for a slot. When the queue is full, or a request waited for
+    max_wait_in_seconds, it is rejected at once with 503 and Retry-After,
+    so clients back off and the rest of the API keeps its latency.
+
+    Use it as a dependency of the endpoint:
+    `dependencies=[Depends(credential_admission)]`.
+
+    Args:
+        settings (AdmissionSettings): The admission control settings.
+    """
+
+    def __init__(self, settings: AdmissionSettings):
+        self.__settings = settings
+        self.__slots = asyncio.Semaphore(settings.max_concurrency)
+        self.__running = 0
+        self.__waiting = 0
+        self.__max_waiting = 0
+        self.__admitted = 0
+        self.__rejected = 0
+        self.__timed_out = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "running": self.__running,
+            "waiting": self.__waiting,
+            "max_waiting": self.__max_waiting,
+            "admitted": self.__admitted,
+            "rejected": self.__rejected,
+            "timed_out": self.__timed_out,
+        }
+
+    def __reject(self, detail: str) -> HTTPException:
+        return HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(self.__settings.retry_after_in_seconds)},
+        )
+
+    async def __acquire(self) -> None:
+        capacity = self.__settings.max_concurrency + self.__settings.max_queue
+        if self.__running + self.__waiting >= capacity:
+            self.__rejected += 1
+            raise self.__reject("Too many requests in progress, retry later")
+        self.__waiting += 1
+        self.__max_waiting = max(self.__max_waiting, self.__waiting)
+        try:
+            await asyncio.wait_for(
+                self.__slots.acquire(), self.__settings.max_wait_in_seconds
+            )
+        except asyncio.TimeoutError:
+            self.__timed_out += 1
+            raise self.__reject("Timed out waiting for a free slot, retry later")
+        finally:
+            self.__waiting -= 1
+
+    async def __call__(self) -> AsyncIterator[None]:
+        """
+        Hold a slot for the duration of the request.
+
+        Raises:
+            HTTPException: 503 with Retry-After if the request is shed.
+        """
+        if not self.__settings.enabled:
+            yield
+            return
+        await self.__acquire()
+        self.__admitted += 1
+        self.__running += 1
+        try:
+            yield
+        finally:
+            self.__running -= 1
+            self.__slots.release()
+
+    def close(self) -> None:
+        """
+        Log the admission stats.
+        """
+        logger.info("Admission controller stats: %s.", self.stats())
+
+
+credential_admission = AdmissionController(settings.admission)
@@ -0,0 +1,18 @@
+import hashlib
+from base64 import urlsafe_b64encode
+
+
+def token_digest(token: str | bytes) -> str:
+    """
+    Build a short stable identifier of a token.
+
+    Args:
+        token (str | bytes): The encoded token.
+
+    Returns:
+        The first 16 bytes of the token's SHA-256 in unpadded base64url.
+    """
+    if isinstance(token, str):
+        token = token.encode("utf-8")
+    digest = hashlib.sha256(token).digest()[:16]
+    return urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
@@ -0,0 +1,97 @@
+import asyncio
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Callable, Literal, TypeVar
+
+ResultType = TypeVar("ResultType")
+
+
+class BoundedExecutor:
+    """
+    Runs CPU-bound calls off the event loop in a bounded pool.
+
+    With kind set to "thread" or "process" the calls run in a pool of
+    workers. At most max_pending calls are handed to the pool at once, the
+    rest wait on the event loop, so a burst cannot grow an unbounded
+    executor queue. The queue depth is the number of calls waiting for a
+    free worker, wherever they wait. With kind set to "inline" the calls
+    run on the event loop. Process workers are spawned rather than forked.
+
+    Args:
+        kind (str): "inline", "thread" or "process".
+        workers (int): The number of workers of the pool.
+        max_pending (int): The maximum number of calls in the pool.
+        name (str): The prefix of the names of the worker threads.
+        initializer (Callable | None): Called once in every process worker.
+    """
+
+    def __init__(
+        self,
+        kind: Literal["inline", "thread", "process"],
+        workers: int,
+        max_pending: int,
+        name: str,
+        initializer: Callable[[], None] | None = None,
+    ):
+        self.__workers = workers
+        self.__executor: Executor | None = None
+        if kind == "thread":
+            self.__executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix=name
+            )
+        elif kind == "process":
+            self.__executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=get_context("spawn"),
+                initializer=initializer,
+            )
+        self.__slots = asyncio.Semaphore(max_pending)
+        self.__pending = 0
+        self.__max_queue_depth = 0
+        self.__completed = 0
+
+    @property
+    def queue_depth(self) -> int:
+        if self.__executor is None:
+            return 0
+        return max(self.__pending - self.__workers, 0)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "workers": self.__workers if self.__executor else 0,
+            "pending": self.__pending,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.__max_queue_depth,
+            "completed": self.__completed,
+        }
+
+    async def run(self, func: Callable[..., ResultType], *args: Any) -> ResultType:
+        """
+        Run a call in the pool, or inline without one.
+
+        Args:
+            func (Callable): The function, picklable for process pools.
+            *args: The arguments of the function.
+
+        Returns:
+            The result of the call.
+        """
+        if self.__executor is None:
+            self.__completed += 1
+            return func(*args)
+        self.__pending += 1
+        self.__max_queue_depth = max(self.__max_queue_depth, self.queue_depth)
+        try:
+            async with self.__slots:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self.__executor, func, *args
+                )
+        finally:
+            self.__pending -= 1
+        self.__completed += 1
+        return result
+
+    def shutdown(self) -> None:
+        if self.__executor is not None:
+            self.__executor.shutdown(cancel_futures=True)
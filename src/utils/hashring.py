@@ -0,0 +1,48 @@
+import bisect
+import hashlib
+
+
+class ConsistentHashRing:
+    """
+    Consistent hash ring mapping keys to nodes.
+
+    Every node is placed on the ring at several virtual points, so the keys
+    spread evenly and adding or removing a node only moves the keys of the
+    ring segments it takes over or gives away.
+
+    Args:
+        nodes (list[str]): The names of the nodes.
+        replicas (int): The number of virtual points per node.
+    """
+
+    def __init__(self, nodes: list[str], replicas: int = 160):
+        self.__replicas = replicas
+        self.__points: list[int] = []
+        self.__nodes: dict[int, str] = {}
+        for node in nodes:
+            self.add_node(node)
+
+    @staticmethod
+    def __hash(key: str) -> int:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little")
+
+    def add_node(self, node: str) -> None:
+        for replica in range(self.__replicas):
+            point = self.__hash(f"{node}#{replica}")
+            if point not in self.__nodes:
+                bisect.insort(self.__points, point)
+            self.__nodes[point] = node
+
+    def remove_node(self, node: str) -> None:
+        for replica in range(self.__replicas):
+            point = self.__hash(f"{node}#{replica}")
+            if self.__nodes.get(point) == node:
+                del self.__nodes[point]
+                self.__points.remove(point)
+
+    def get_node(self, key: str) -> str:
+        if not self.__points:
+            raise LookupError("The hash ring has no nodes")
+        index = bisect.bisect(self.__points, self.__hash(key))
+        return self.__nodes[self.__points[index % len(self.__points)]]
@@ -0,0 +1,69 @@
+import hashlib
+import json
+from base64 import urlsafe_b64encode
+from functools import lru_cache
+
+from jwt.algorithms import get_default_algorithms
+
+_THUMBPRINT_MEMBERS = {
+    "RSA": ("e", "kty", "n"),
+    "EC": ("crv", "kty", "x", "y"),
+    "OKP": ("crv", "kty", "x"),
+    "oct": ("k", "kty"),
+}
+
+
+def key_thumbprint(jwk: dict[str, str]) -> str:
+    """
+    Build the RFC 7638 thumbprint of a public JWK, used as its key id.
+
+    Args:
+        jwk (dict[str, str]): The public JWK.
+
+    Returns:
+        The SHA-256 of the required members of the key in unpadded base64url.
+    """
+    members = {name: jwk[name] for name in _THUMBPRINT_MEMBERS[jwk["kty"]]}
+    canonical = json.dumps(members, separators=(",", ":"), sort_keys=True)
+    digest = hashlib.sha256(canonical.encode("utf-8")).digest()
+    return urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def _to_jwk(key: str, algorithm: str) -> dict[str, str]:
+    jwt_algorithm = get_default_algorithms()[algorithm]
+    jwk = jwt_algorithm.to_jwk(jwt_algorithm.prepare_key(key), as_dict=True)
+    # RFC 7517 advises against combining "key_ops" with "use"
+    jwk.pop("key_ops", None)
+    return jwk
+
+
+@lru_cache
+def key_id(key: str, algorithm: str) -> str:
+    """
+    Get the key id of a verification key.
+
+    Args:
+        key (str): The secret of an HS* algorithm or the PEM encoded public key.
+        algorithm (str): The signature algorithm the key is used with.
+
+    Returns:
+        The thumbprint of the key.
+    """
+    return key_thumbprint(_to_jwk(key, algorithm))
+
+
+@lru_cache
+def public_jwk(public_key: str, algorithm: str) -> dict[str, str]:
+    """
+    Build the public JWK of a PEM encoded key.
+
+    Args:
+        public_key (str): The PEM encoded public key.
+        algorithm (str): The signature algorithm the key is used with.
+
+    Returns:
+        The JWK with its thumbprint as the key id.
+    """
+    jwk = _to_jwk(public_key, algorithm)
+    jwk.update({"kid": key_thumbprint(jwk), "use": "sig", "alg": algorithm})
+    return jwk
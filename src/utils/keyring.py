@@ -0,0 +1,90 @@
+from typing import Any
+
+from jwt import InvalidKeyError
+from jwt.algorithms import get_default_algorithms
+
+from src.configs import settings
+from src.configs.authjwt import AuthJWTSettings
+from src.utils.jwks import key_id, public_jwk
+
+
+class KeyRing:
+    """
+    Keys of the JWT signature by key id.
+
+    One key signs the new tokens, the current one and the previous keys
+    verify them. Every key is parsed once when the ring is built, so neither
+    signing nor verification parses a PEM or a secret per request.
+
+    Args:
+        settings (AuthJWTSettings): The JWT settings.
+    """
+
+    def __init__(self, settings: AuthJWTSettings):
+        self.__settings = settings
+        algorithm = get_default_algorithms()[settings.authjwt_algorithm]
+        self.__signing_kid = key_id(
+            settings.verification_key, settings.authjwt_algorithm
+        )
+        self.__signing_key = algorithm.prepare_key(
+            settings.authjwt_private_key
+            if settings.is_asymmetric
+            else settings.authjwt_secret_key
+        )
+        self.__keys: dict[str, Any] = {
+            key_id(key, settings.authjwt_algorithm): algorithm.prepare_key(key)
+            for key in settings.authjwt_previous_keys
+        }
+        self.__keys[self.__signing_kid] = algorithm.prepare_key(
+            settings.verification_key
+        )
+
+    @property
+    def signing_kid(self) -> str:
+        return self.__signing_kid
+
+    @property
+    def signing_key(self) -> Any:
+        return self.__signing_key
+
+    def get_verification_key(self, kid: str | None) -> Any:
+        """
+        Get the parsed key that verifies a token.
+
+        Args:
+            kid (str | None): The "kid" header of the token. Tokens issued
+                before the key ring carry none and are verified with the
+                current key.
+
+        Returns:
+            The parsed verification key.
+
+        Raises:
+            InvalidKeyError: If the key id is not in the ring.
+        """
+        if kid is None:
+            return self.__keys[self.__signing_kid]
+        try:
+            return self.__keys[kid]
+        except KeyError:
+            raise InvalidKeyError(f"Unknown key id {kid}") from None
+
+    def public_jwks(self) -> list[dict[str, str]]:
+        """
+        Get the JWK of every public key in the ring, the current one first.
+
+        The list is empty for HS* algorithms, so a secret is never published.
+        """
+        if not self.__settings.is_asymmetric:
+            return []
+        algorithm = self.__settings.authjwt_algorithm
+        return [
+            public_jwk(key, algorithm)
+            for key in [
+                self.__settings.authjwt_public_key,
+                *self.__settings.authjwt_previous_keys,
+            ]
+        ]
+
+
+key_ring = KeyRing(settings.token)
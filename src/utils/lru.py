@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Generic, Hashable, TypeVar
+
+KeyType = TypeVar("KeyType", bound=Hashable)
+ValueType = TypeVar("ValueType")
+
+
+class LRUCache(Generic[KeyType, ValueType]):
+    """
+    Bounded in-process cache with per-entry TTL and LRU eviction.
+
+    Args:
+        max_size (int): The maximum number of entries.
+        ttl (float): The default lifetime of an entry in seconds.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.__data: OrderedDict[KeyType, tuple[float, ValueType]] = OrderedDict()
+        self.__max_size = max_size
+        self.__ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, key: KeyType) -> ValueType | None:
+        item = self.__data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires_at, value = item
+        if expires_at <= monotonic():
+            del self.__data[key]
+            self.misses += 1
+            return None
+        self.__data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: KeyType, value: ValueType, ttl: float | None = None) -> None:
+        ttl = self.__ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self.__data[key] = (monotonic() + ttl, value)
+        self.__data.move_to_end(key)
+        while len(self.__data) > self.__max_size:
+            self.__data.popitem(last=False)
+
+    def delete(self, key: KeyType) -> None:
+        self.__data.pop(key, None)
+
+    def clear(self) -> None:
+        self.__data.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "size": len(self.__data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hit_ratio,
+        }
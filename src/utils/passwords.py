@@ -0,0 +1,91 @@
+import logging
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from src.configs import PasswordSettings, settings
+from src.utils.executor import BoundedExecutor
+
+logger = logging.getLogger("PasswordHasher")
+
+
+class PasswordHasher:
+    """
+    Hashes and checks passwords off the event loop.
+
+    A password hash is deliberately slow: tens to hundreds of milliseconds
+    of CPU. Run on the event loop it stalls every request of the worker, so
+    the hashes run in a BoundedExecutor of hash_workers, at most
+    hash_max_pending at once. hashlib releases the GIL while hashing, so a
+    thread pool is enough to keep the event loop free. New hashes follow
+    the hash policy of the settings.
+
+    Args:
+        settings (PasswordSettings): The password settings.
+    """
+
+    def __init__(self, settings: PasswordSettings):
+        self.__settings = settings
+        self.__executor = BoundedExecutor(
+            settings.hash_executor,
+            workers=settings.hash_workers,
+            max_pending=settings.hash_max_pending,
+            name="password-hasher",
+        )
+
+    def stats(self) -> dict[str, int]:
+        return self.__executor.stats()
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password.
+
+        Args:
+            password (str): The password in plain text.
+
+        Returns:
+            The hash to store.
+        """
+        return await self.__executor.run(
+            generate_password_hash,
+            password,
+            self.__settings.hash_method,
+            self.__settings.salt_length,
+        )
+
+    async def verify(self, password_hash: str, password: str) -> bool:
+        """
+        Check a password against its stored hash.
+
+        Args:
+            password_hash (str): The stored hash.
+            password (str): The password in plain text.
+
+        Returns:
+            True if the password matches the hash.
+        """
+        return await self.__executor.run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """
+        Check whether a stored hash was made with another hash policy.
+
+        Args:
+            password_hash (str): The stored hash.
+
+        Returns:
+            True if rehash_on_login is enabled and the hash is outdated.
+        """
+        if not self.__settings.rehash_on_login:
+            return False
+        method, _, _ = password_hash.partition("$")
+        return method != self.__settings.hash_method
+
+    def close(self) -> None:
+        """
+        Log the hashing stats and shut the pool down.
+        """
+        logger.info("Password hasher stats: %s.", self.stats())
+        self.__executor.shutdown()
+
+
+password_hasher = PasswordHasher(settings.password)
@@ -0,0 +1,93 @@
+import hashlib
+
+from functools import lru_cache
+from typing import Any
+from uuid import UUID
+
+from fastapi import Depends
+
+from src.configs import TokenSettings, settings
+from src.db.repositories.permission import (
+    PermissionRepository,
+    get_permission_repository,
+)
+from src.models.api.v1.permissions import ResponsePermissionCatalog
+from src.utils.lru import LRUCache
+
+
+class PermissionClaims:
+    """
+    Builds the permission claims of access tokens.
+
+    With permission_claims set to "names" the token carries the names of the
+    permissions of the role in "perms". With "bitmask" it carries a hex
+    bitmask over the permission catalog in "perms" and the version of the
+    catalog in "pv": bit N is the N-th permission of the catalog, ordered by
+    creation. Gateways fetch the catalog once per version, with an
+    administrator account, and authorize requests without calling the auth
+    service. The catalog and the
+    permissions of every role are cached per worker for
+    permission_cache_ttl_in_seconds.
+
+    Args:
+        repository (PermissionRepository): The permission repository.
+        settings (TokenSettings): The token settings.
+    """
+
+    def __init__(self, repository: PermissionRepository, settings: TokenSettings):
+        self.__repository = repository
+        self.__settings = settings
+        self.__roles: LRUCache[str, list[str]] = LRUCache(
+            1024, ttl=settings.permission_cache_ttl_in_seconds
+        )
+        self.__catalog: LRUCache[str, ResponsePermissionCatalog] = LRUCache(
+            1, ttl=settings.permission_cache_ttl_in_seconds
+        )
+
+    async def get_catalog(self) -> ResponsePermissionCatalog:
+        catalog = self.__catalog.get("catalog")
+        if catalog is None:
+            names = await self.__repository.get_catalog()
+            digest = hashlib.blake2b("\n".join(names).encode("utf-8"), digest_size=8)
+            catalog = ResponsePermissionCatalog(
+                version=digest.hexdigest(), permissions=names
+            )
+            self.__catalog.set("catalog", catalog)
+        return catalog
+
+    async def __get_names(self, role_uuid: str) -> list[str]:
+        names = self.__roles.get(role_uuid)
+        if names is None:
+            try:
+                names = await self.__repository.get_names_by_role(UUID(role_uuid))
+            except ValueError:
+                names = []
+            self.__roles.set(role_uuid, names)
+        return names
+
+    async def get_claims(self, role_uuid: str) -> dict[str, Any]:
+        """
+        Get the permission claims of a role.
+
+        Args:
+            role_uuid (str): The UUID of the role of the user.
+
+        Returns:
+            The claims to add to the access token, empty when disabled.
+        """
+        if self.__settings.permission_claims == "none":
+            return {}
+        names = await self.__get_names(role_uuid)
+        if self.__settings.permission_claims == "names":
+            return {"perms": names}
+        catalog = await self.get_catalog()
+        bits = {name: bit for bit, name in enumerate(catalog.permissions)}
+        mask = sum(1 << bits[name] for name in names if name in bits)
+        return {"perms": format(mask, "x"), "pv": catalog.version}
+
+
+@lru_cache
+def get_permission_claims(
+    repository: PermissionRepository = Depends(get_permission_repository),
+) -> PermissionClaims:
+    return PermissionClaims(repository, settings.token)
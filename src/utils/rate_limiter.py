@@ -0,0 +1,20 @@
+from fastapi import Request, Response
+from fastapi_limiter import FastAPILimiter
+from fastapi_limiter.depends import RateLimiter as RedisRateLimiter
+
+from src.configs import settings
+
+
+class RateLimiter(RedisRateLimiter):
+    """
+    Rate limiter of fastapi_limiter that is off without Redis.
+
+    fastapi_limiter keeps its counters in Redis only. With
+    CACHE_BACKEND=memory the application starts without Redis, so the
+    limits are not applied; that backend is meant for tests and benchmarks.
+    """
+
+    async def __call__(self, request: Request, response: Response) -> None:
+        if settings.cache.backend == "memory" and FastAPILimiter.redis is None:
+            return
+        await super().__call__(request, response)
@@ -1,42 +1,36 @@
-from datetime import datetime, timedelta
+import asyncio
+import secrets
+
+from datetime import datetime, timedelta, timezone
 from functools import lru_cache
+from typing import Any
+from uuid import uuid4
 
 from async_fastapi_jwt_auth import AuthJWT
 from async_fastapi_jwt_auth.auth_jwt import AuthJWTBearer
-from fastapi import Depends
+from fastapi import Depends, Response
 
-from src.cache.redis import RedisCache, get_redis
+from src.cache.abstract import AbstractCache
+from src.cache.redis import get_redis
 from src.configs import TokenSettings
 from src.models.token import CacheTokens, UserClaims
+from src.utils.keyring import key_ring
+from src.utils.permissions import PermissionClaims, get_permission_claims
+from src.utils.signer import token_signer
 
 
 class TokenUtils:
     def __init__(
         self,
-        cache: RedisCache,
+        cache: AbstractCache,
         authorize: AuthJWT,
         settings: TokenSettings,
+        permissions: PermissionClaims,
     ):
         self.__cache = cache
         self.__authorize = authorize
         self.__settings = settings
-
-    async def delete_oldest_token_if_necessary(self, user_uuid: str) -> None:
-        # TODO Возможно ли лучше?)
-        tokens = await self.__cache.get_tokens(user_uuid)
-        if not tokens:
-            return
-        if len(tokens) >= self.__settings.user_max_sessions:
-            oldest = datetime.max
-            oldest_token = tokens[0]
-            for token in tokens:
-                user_claims = await self.__authorize.get_raw_jwt(token)
-                token_end = datetime.fromtimestamp(user_claims.get("exp"))
-                if oldest > token_end:
-                    oldest = token_end
-                    oldest_token = token
-
-            await self.__cache.delete_tokens(user_uuid, oldest_token)
+        self.__permissions = permissions
 
     async def unset_tokens_from_cookies(
         self, access: bool = False, refresh: bool = False
@@ -46,35 +40,111 @@ class TokenUtils:
         if refresh:
             await self.__authorize.unset_refresh_cookies()
 
-    async def set_tokens_to_cookies(self, tokens: CacheTokens) -> None:
+    async def set_tokens_to_cookies(
+        self, tokens: CacheTokens, response: Response
+    ) -> None:
         if tokens.access:
-            await self.__authorize.set_access_cookies(tokens.access)
-        if tokens.refresh:
-            await self.__authorize.set_refresh_cookies(tokens.refresh)
+            await self.__authorize.set_access_cookies(tokens.access, response)
+        if not tokens.refresh:
+            return
+        if self.__settings.opaque_refresh_tokens:
+            self.__set_opaque_refresh_cookie(tokens.refresh, response)
+        else:
+            await self.__authorize.set_refresh_cookies(tokens.refresh, response)
 
-    async def create_tokens(self, user_claims: UserClaims) -> CacheTokens:
-        new_access_token = await self.__authorize.create_access_token(
-            subject=user_claims.user_uuid, user_claims=user_claims.model_dump()
+    def __set_opaque_refresh_cookie(self, token: str, response: Response) -> None:
+        # AuthJWT derives the CSRF cookie from the claims of the token, and an
+        # opaque token has none, so the cookie is set on the response directly,
+        # with the settings AuthJWT sets its refresh cookie with.
+        response.set_cookie(
+            "refresh_token_cookie",
+            token,
+            max_age=self.__settings.authjwt_cookie_max_age,
+            path="/",
+            domain=self.__settings.authjwt_cookie_domain,
+            secure=self.__settings.authjwt_cookie_secure,
+            httponly=True,
+            samesite=self.__settings.authjwt_cookie_samesite,
         )
-        new_refresh_token = await self.__authorize.create_refresh_token(
-            subject=user_claims.user_uuid,
-            expires_time=timedelta(self.__settings.expire_time_in_minutes),
-            user_claims=user_claims.model_dump(),
+
+    def _claims(
+        self, user_claims: UserClaims, token_type: str, expires_in: timedelta
+    ) -> dict[str, Any]:
+        # The same claims AuthJWT puts in its tokens, so it can read them back.
+        now = int(datetime.now(timezone.utc).timestamp())
+        claims = {
+            "sub": user_claims.user_uuid,
+            "iat": now,
+            "nbf": now,
+            "jti": str(uuid4()),
+            "exp": now + int(expires_in.total_seconds()),
+            "type": token_type,
+        }
+        if token_type == "access":
+            claims["fresh"] = False
+        if (
+            "cookies" in self.__settings.authjwt_token_location
+            and self.__settings.authjwt_cookie_csrf_protect
+        ):
+            claims["csrf"] = str(uuid4())
+        claims.update(user_claims.model_dump())
+        return claims
+
+    async def _sign(self, claims: dict[str, Any]) -> str:
+        # The key id lets the verifiers pick the key from the key ring.
+        return await token_signer.sign(claims, {"kid": key_ring.signing_kid})
+
+    async def create_access_token(self, user_claims: UserClaims) -> str:
+        claims = self._claims(
+            user_claims,
+            "access",
+            timedelta(seconds=self.__settings.authjwt_access_token_expires),
         )
-        return CacheTokens(access=new_access_token, refresh=new_refresh_token)
+        claims.update(await self.__permissions.get_claims(user_claims.role_uuid))
+        return await self._sign(claims)
 
-    async def base_login(self, user_claims: UserClaims) -> None:
+    async def create_refresh_token(self, user_claims: UserClaims) -> str:
+        if self.__settings.opaque_refresh_tokens:
+            return f"{user_claims.user_uuid}.{secrets.token_urlsafe(32)}"
+        return await self._sign(
+            self._claims(
+                user_claims,
+                "refresh",
+                timedelta(minutes=self.__settings.expire_time_in_minutes),
+            )
+        )
+
+    async def create_tokens(self, user_claims: UserClaims) -> CacheTokens:
+        access, refresh = await asyncio.gather(
+            self.create_access_token(user_claims),
+            self.create_refresh_token(user_claims),
+        )
+        return CacheTokens(access=access, refresh=refresh)
+
+    async def base_login(
+        self,
+        user_claims: UserClaims,
+        response: Response,
+        device: str | None = None,
+        ip_address: str | None = None,
+    ) -> None:
         tokens = await self.create_tokens(user_claims)
-        await self.set_tokens_to_cookies(tokens)
-        await self.delete_oldest_token_if_necessary(user_claims.user_uuid)
-        await self.__cache.set_token(user_claims.user_uuid, tokens.refresh)
+        await self.set_tokens_to_cookies(tokens, response)
+        await self.__cache.set_token(
+            user_claims.user_uuid,
+            tokens.refresh,
+            device,
+            ip_address,
+            user_claims.role_uuid,
+        )
         # TODO Нотификация с логирование пользователя
 
 
 @lru_cache
 def get_token_utils(
-    cache: RedisCache = Depends(get_redis),
+    cache: AbstractCache = Depends(get_redis),
     authorize: AuthJWT = AuthJWTBearer(),
     settings: TokenSettings = TokenSettings(),
+    permissions: PermissionClaims = Depends(get_permission_claims),
 ) -> TokenUtils:
-    return TokenUtils(cache, authorize, settings)
+    return TokenUtils(cache, authorize, settings, permissions)
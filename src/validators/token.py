@@ -1,25 +1,129 @@
+import logging
+
 from http import HTTPStatus
+from time import time
+from typing import Any
 
-from fastapi import HTTPException
+from fastapi import HTTPException, Request
 from jwt import (
-    ExpiredSignatureError,
-    InvalidSignatureError,
+    InvalidKeyError,
+    InvalidTokenError,
     decode,
+    get_unverified_header,
 )
 
+from src.cache.revocation import RevocationList
 from src.configs import settings
+from src.utils.digest import token_digest
+from src.utils.keyring import key_ring
+from src.utils.lru import LRUCache
+
+logger = logging.getLogger("TokenValidator")
+
+decoded_tokens: LRUCache[str, dict[str, Any]] = LRUCache(
+    settings.token.decode_cache_max_size, ttl=0
+)
 
 
-def validate_token(token: str | bytes) -> dict[str, str] | None:
+def validate_token(token: str | bytes) -> dict[str, Any]:
+    """
+    Decode a JWT and verify its signature and expiry.
+
+    The claims of verified tokens are kept in a per-worker LRU keyed by the
+    token digest until the token expires, so a hot token is verified once.
+    The key is picked from the key ring by the "kid" header of the token.
+    """
+    key = token_digest(token)
+    raw_jwt = decoded_tokens.get(key)
+    if raw_jwt is not None:
+        return dict(raw_jwt)
     try:
+        kid = get_unverified_header(token).get("kid")
         raw_jwt = decode(
             jwt=token,
-            key=settings.token.authjwt_secret_key,
+            key=key_ring.get_verification_key(kid),
             algorithms=[settings.token.authjwt_algorithm],
         )
-    except (InvalidSignatureError, ExpiredSignatureError) as e:
+    except (InvalidTokenError, InvalidKeyError) as e:
         raise HTTPException(
             status_code=HTTPStatus.UNAUTHORIZED,
             detail=f"{e}: invalid token",
         ) from None
+    expires_at = raw_jwt.get("exp")
+    if expires_at:
+        decoded_tokens.set(key, dict(raw_jwt), ttl=expires_at - time())
+    return raw_jwt
+
+
+def decode_cache_stats() -> dict[str, int | float]:
+    return decoded_tokens.stats()
+
+
+def log_decode_cache_stats() -> None:
+    logger.info("Token decode cache stats: %s.", decode_cache_stats())
+
+
+def is_opaque_token(token: str) -> bool:
+    """
+    Tell an opaque refresh token "<user_uuid>.<random>" from a JWT.
+    """
+    user_uuid, separator, secret = token.partition(".")
+    return bool(user_uuid and separator and secret and "." not in secret)
+
+
+def validate_refresh_token(token: str) -> dict[str, Any]:
+    """
+    Get the claims of a refresh token.
+
+    An opaque refresh token only tells its owner and proves nothing: the
+    session store is its sole authority, so the caller must check it has a
+    live session before acting on it. Opaque tokens are only accepted when
+    OPAQUE_REFRESH_TOKENS is on. JWTs are accepted in both modes, so they
+    stay valid after the mode is switched on. The claims always hold the
+    "user_uuid" of the owner.
+    """
+    if settings.token.opaque_refresh_tokens and is_opaque_token(token):
+        return {"user_uuid": token.partition(".")[0]}
+    raw_jwt = validate_token(token)
+    if not raw_jwt.get("user_uuid"):
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail="The token has no owner",
+        )
+    return raw_jwt
+
+
+async def check_revocation(
+    raw_jwt: dict[str, Any], revocation_list: RevocationList
+) -> None:
+    jti = raw_jwt.get("jti")
+    if jti and await revocation_list.is_revoked(jti):
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail="The token has been revoked",
+        )
+
+
+async def get_request_claims(
+    request: Request, revocation_list: RevocationList
+) -> dict[str, Any]:
+    """
+    Get the verified claims of the access token of a request.
+
+    The token is decoded and checked against the revocation list once per
+    request: the claims are kept on request.state and every later caller
+    within the request gets them from there.
+    """
+    raw_jwt = getattr(request.state, "auth_claims", None)
+    if raw_jwt is not None:
+        return raw_jwt
+    token = request.cookies.get("access_token_cookie")
+    if not token:
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail="No token",
+        )
+    raw_jwt = validate_token(token)
+    await check_revocation(raw_jwt, revocation_list)
+    request.state.auth_claims = raw_jwt
     return raw_jwt
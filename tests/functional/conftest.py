@@ -58,6 +58,21 @@ def make_post_request(session: aiohttp.ClientSession):
     return inner
 
 
+@pytest.fixture
+def make_client_post_request(session: aiohttp.ClientSession):
+    async def inner(path: str, client_ip: str, body: dict = None):
+        # The rate limiter tells clients apart by X-Forwarded-For, so a burst
+        # of requests from distinct clients reaches the endpoint.
+        url = "http://" + settings.get_api_host + "/auth/v1" + path
+        headers = {"X-Forwarded-For": client_ip}
+        async with session.post(url, json=body, headers=headers) as response:
+            await response.read()
+        session.cookie_jar.clear()
+        return response.status, response.headers
+
+    return inner
+
+
 @pytest.fixture
 def make_patch_request(session: aiohttp.ClientSession):
     async def inner(
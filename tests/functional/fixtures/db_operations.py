@@ -1,3 +1,7 @@
+import hashlib
+from base64 import urlsafe_b64encode
+from time import time
+
 import pytest
 
 from redis.asyncio import Redis
@@ -63,6 +67,20 @@ def postgres_execute(postgres_client: _connection):
     return inner
 
 
+@pytest.fixture
+def postgres_fetch_one(postgres_client: _connection):
+    async def inner(query: str):
+        try:
+            cursor = postgres_client.cursor()
+            cursor.execute(query)
+            return cursor.fetchone()
+        finally:
+            postgres_client.rollback()
+            cursor.close()
+
+    return inner
+
+
 @pytest.fixture
 def clear_cache(redis_client: Redis):
     async def inner():
@@ -71,18 +89,30 @@ def clear_cache(redis_client: Redis):
     return inner
 
 
+def token_digest(token: str | bytes) -> str:
+    if isinstance(token, str):
+        token = token.encode("utf-8")
+    digest = hashlib.sha256(token).digest()[:16]
+    return urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+@pytest.fixture
+def session_id():
+    return token_digest
+
+
 @pytest.fixture
 def set_token(redis_client: Redis):
     async def inner(uuid, token):
-        if isinstance(token, bytes):
-            token = str(token, encoding="utf-8")
-        key = f"{str(uuid)}:{token}"
-        value = token
+        key = f"sessions:{{{str(uuid)}}}"
         token_expire_in_days = settings.token_expire_time
         token_expire_in_sec = token_expire_in_days * 24 * 60 * 60
 
         try:
-            await redis_client.set(key, value, token_expire_in_sec)
+            await redis_client.zadd(
+                key, {token_digest(token): time() + token_expire_in_sec}
+            )
+            await redis_client.expire(key, token_expire_in_sec)
         except Exception:
             raise Exception
 
@@ -91,15 +121,10 @@ def set_token(redis_client: Redis):
 
 @pytest.fixture
 def get_tokens(redis_client: Redis):
-    async def inner(key_pattern):
-        max_sessions = settings.user_max_sessions
-        keys = []
-        async for key in redis_client.scan_iter(f"{str(key_pattern)}:*", 10000):
-            keys.append(key)
-            if len(keys) == max_sessions:
-                break
+    async def inner(uuid):
+        key = f"sessions:{{{str(uuid)}}}"
         try:
-            values = await redis_client.mget(keys)
+            values = await redis_client.zrange(key, 0, -1)
             if not values:
                 return None
         except Exception:
@@ -112,21 +137,12 @@ def get_tokens(redis_client: Redis):
 @pytest.fixture
 def delete_tokens(redis_client: Redis):
     async def inner(uuid, token, all=False):
-        if all:
-            key_pattern = uuid
-            max_sessions = settings.user_max_sessions
-            keys = []
-            async for key in redis_client.scan_iter(f"{str(key_pattern)}:*", 10000):
-                keys.append(key)
-                if len(keys) == max_sessions:
-                    break
-        else:
-            if isinstance(token, bytes):
-                token = str(token, encoding="utf-8")
-            key = f"{str(uuid)}:{token}"
-            keys = [key]
+        key = f"sessions:{{{str(uuid)}}}"
         try:
-            await redis_client.delete(*keys)
+            if all:
+                await redis_client.delete(key)
+            else:
+                await redis_client.zrem(key, token_digest(token))
         except Exception:
             raise Exception
 
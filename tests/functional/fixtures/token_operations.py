@@ -1,3 +1,7 @@
+import hashlib
+import json
+from base64 import urlsafe_b64encode
+
 import pytest
 import jwt
 from tests.functional import settings
@@ -28,22 +32,42 @@ def validate_token():
     return inner
 
 
-async def create_token(user_claims: UserClaims, token_type: str, secret_key: str):
+async def create_token(
+    user_claims: UserClaims, token_type: str, secret_key: str, kid: str | None = None
+):
     payload = user_claims.model_dump()
     payload.update({"sub": user_claims.user_uuid, "type": token_type})
     return jwt.encode(
         payload=payload,
         key=secret_key,
+        headers={"kid": kid} if kid else None,
     )
 
 
+def _base64url(value: bytes) -> str:
+    return urlsafe_b64encode(value).rstrip(b"=").decode("ascii")
+
+
+def secret_key_id(secret_key: str) -> str:
+    jwk = {"k": _base64url(secret_key.encode("utf-8")), "kty": "oct"}
+    members = json.dumps(jwk, separators=(",", ":"), sort_keys=True)
+    return _base64url(hashlib.sha256(members.encode("utf-8")).digest())
+
+
+@pytest.fixture
+def key_id():
+    return secret_key_id
+
+
 @pytest.fixture
 def create_tokens():
     async def inner(
-        user_claims: UserClaims, secret_key: str = settings.secret_key
+        user_claims: UserClaims,
+        secret_key: str = settings.secret_key,
+        kid: str | None = None,
     ) -> CacheTokens:
-        new_access_token = await create_token(user_claims, "access", secret_key)
-        new_refresh_token = await create_token(user_claims, "refresh", secret_key)
+        new_access_token = await create_token(user_claims, "access", secret_key, kid)
+        new_refresh_token = await create_token(user_claims, "refresh", secret_key, kid)
         return CacheTokens(
             access_token_cookie=new_access_token,
             refresh_token_cookie=new_refresh_token,
@@ -42,8 +42,24 @@ class TestSettings(BaseSettings):
 
     token_expire_time: int = Field(..., alias="TOKEN_EXPIRE_TIME")
     user_max_sessions: int = Field(..., alias="USER_MAX_SESSIONS")
+    cache_bulk_max_users: int = Field(default=10000, alias="CACHE_BULK_MAX_USERS")
+    admission_max_concurrency: int = Field(default=8, alias="ADMISSION_MAX_CONCURRENCY")
+    admission_max_queue: int = Field(default=32, alias="ADMISSION_MAX_QUEUE")
+    admission_retry_after_in_seconds: int = Field(
+        default=1, alias="ADMISSION_RETRY_AFTER_IN_SECONDS"
+    )
+
+    verify_batch_rate_limit: int = Field(
+        default=50, alias="TOKEN_VERIFY_BATCH_RATE_LIMIT"
+    )
 
     secret_key: str = Field(..., alias="AUTHJWT_SECRET_KEY")
+    previous_keys: list[str] = Field(default=[], alias="AUTHJWT_PREVIOUS_KEYS")
+    opaque_refresh_tokens: bool = Field(default=False, alias="OPAQUE_REFRESH_TOKENS")
+    permission_claims: str = Field(default="none", alias="TOKEN_PERMISSION_CLAIMS")
+    permission_cache_ttl_in_seconds: float = Field(
+        default=60, alias="TOKEN_PERMISSION_CACHE_TTL_IN_SECONDS"
+    )
 
     @property
     def psycopg2_connect(self) -> dict:
@@ -350,3 +350,44 @@ async def test_delete_permission(
     assert status == expected_answer.get("status")
     if status == HTTPStatus.OK:
         assert body == expected_answer.get("body")
+
+
+@pytest.mark.parametrize(
+    "is_superuser, expected_answer",
+    [
+        (True, {"status": HTTPStatus.OK}),
+        (False, {"status": HTTPStatus.FORBIDDEN}),
+        (None, {"status": HTTPStatus.UNAUTHORIZED}),
+    ],
+)
+@pytest.mark.asyncio
+async def test_permission_catalog(
+    make_get_request,
+    postgres_write_data,
+    postgres_execute,
+    create_tokens,
+    is_superuser,
+    expected_answer,
+):
+    await postgres_execute(del_query_user)
+    await postgres_execute(del_query_role_perm)
+    await postgres_execute(del_query_role)
+
+    await postgres_write_data([role_super_data], "roles")
+    await postgres_write_data(
+        [{**user_super_data, "is_superuser": bool(is_superuser)}], "users"
+    )
+
+    cookies = None
+    if is_superuser is not None:
+        payload = UserClaims(user_uuid=id_super, role_uuid=id_super)
+        tokens = await create_tokens(payload)
+        cookies = {"access_token_cookie": tokens.access_token_cookie}
+
+    response = await make_get_request("/permissions/catalog/", cookies=cookies)
+    body, status, _ = response
+
+    assert status == expected_answer.get("status")
+    if status == HTTPStatus.OK:
+        assert isinstance(body.get("version"), str)
+        assert isinstance(body.get("permissions"), list)
@@ -1,3 +1,9 @@
+import asyncio
+import json
+import secrets
+import time
+
+import jwt
 import pytest
 from http import HTTPStatus
 
@@ -7,7 +13,7 @@ from tests.functional import (
     token_uregistered_email_request_login,
     token_invalid_password_request_login,
 )
-from tests.functional import UserClaims
+from tests.functional import settings, UserClaims
 from tests.functional import (
     del_query as del_query_role,
     del_query_role_perm,
@@ -16,9 +22,17 @@ from tests.functional import (
     del_query as del_query_user,
     del_history_query,
     user_super_data,
+    user_super_old_hash_data,
+    old_password_policy,
     role_super_data,
 )
 from tests.functional import (
+    permission_1,
+    permission_2,
+    del_query as del_query_permission,
+)
+from tests.functional import (
+    ids,
     id_super,
     id_good_1,
     id_good_2,
@@ -56,6 +70,7 @@ async def test_login(
     postgres_execute,
     validate_token,
     get_tokens,
+    session_id,
     clear_cache,
     query_data,
     expected_answer,
@@ -82,7 +97,85 @@ async def test_login(
         cahche_token = [
             str(token, encoding=("utf-8")) for token in await get_tokens(id_super)
         ]
-        assert refresh_token_cookie in cahche_token
+        assert session_id(refresh_token_cookie) in cahche_token
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_old_password_hash(
+    make_post_request,
+    postgres_write_data,
+    postgres_execute,
+    postgres_fetch_one,
+    clear_cache,
+):
+    await postgres_execute(del_history_query)
+    await postgres_execute(del_query_user)
+    await postgres_execute(del_query_role_perm)
+    await postgres_execute(del_query_role)
+    await clear_cache()
+
+    await postgres_write_data([role_super_data], "roles")
+    await postgres_write_data([user_super_old_hash_data], "users")
+    query = f"SELECT password FROM public.users WHERE uuid = '{id_super}';"
+
+    _, status, _ = await make_post_request("/tokens/login/", body=token_request_login)
+    assert status == HTTPStatus.OK
+
+    # The hash is upgraded by a background task after the response.
+    for _ in range(50):
+        (password_hash,) = await postgres_fetch_one(query)
+        if password_hash != user_super_old_hash_data.get("password"):
+            break
+        await asyncio.sleep(0.1)
+    assert not password_hash.startswith(f"{old_password_policy}$")
+
+    await asyncio.sleep(1)
+    _, status, _ = await make_post_request("/tokens/login/", body=token_request_login)
+    assert status == HTTPStatus.OK
+    (new_password_hash,) = await postgres_fetch_one(query)
+    assert new_password_hash == password_hash
+
+
+@pytest.mark.asyncio
+async def test_login_at_session_cap(
+    make_post_request,
+    make_get_request,
+    postgres_write_data,
+    postgres_execute,
+    session_id,
+    clear_cache,
+):
+    await postgres_execute(del_history_query)
+    await postgres_execute(del_query_user)
+    await postgres_execute(del_query_role_perm)
+    await postgres_execute(del_query_role)
+    await clear_cache()
+
+    await postgres_write_data([role_super_data], "roles")
+    await postgres_write_data([user_super_data], "users")
+
+    # logins of the same second must evict the oldest sessions in login
+    # order and never the session they create
+    refresh_tokens = []
+    while len(refresh_tokens) < settings.user_max_sessions + 2:
+        _, status, cookies = await make_post_request(
+            "/tokens/login/", body=token_request_login
+        )
+        if status == HTTPStatus.TOO_MANY_REQUESTS:
+            await asyncio.sleep(1)
+            continue
+        assert status == HTTPStatus.OK
+        refresh_tokens.append(cookies.get("refresh_token_cookie").coded_value)
+
+    cookies = {"access_token_cookie": cookies.get("access_token_cookie").coded_value}
+    body, status, _ = await make_get_request(
+        f"/users/{id_super}/sessions/", cookies=cookies
+    )
+
+    assert status == HTTPStatus.OK
+    assert {session.get("session_id") for session in body} == {
+        session_id(token) for token in refresh_tokens[-settings.user_max_sessions :]
+    }
 
 
 @pytest.mark.parametrize(
@@ -105,6 +198,7 @@ async def test_refresh(
     create_tokens,
     set_token,
     get_tokens,
+    session_id,
     clear_cache,
     query_data,
     expected_answer,
@@ -131,8 +225,35 @@ async def test_refresh(
         cahche_tokens = [
             str(token, encoding=("utf-8")) for token in await get_tokens(query_data)
         ]
-        assert tokens.refresh_token_cookie not in cahche_tokens
-        assert cookies.get("refresh_token_cookie").coded_value in cahche_tokens
+        assert session_id(tokens.refresh_token_cookie) not in cahche_tokens
+        new_refresh_token = cookies.get("refresh_token_cookie").coded_value
+        assert session_id(new_refresh_token) in cahche_tokens
+
+
+@pytest.mark.asyncio
+async def test_refresh_within_grace_period(
+    make_post_request,
+    create_tokens,
+    set_token,
+    clear_cache,
+):
+    await clear_cache()
+
+    payload = UserClaims(user_uuid=id_good_1, role_uuid=id_good_1)
+    tokens = await create_tokens(payload)
+    await set_token(id_good_1, tokens.refresh_token_cookie)
+    path = "/tokens/refresh/"
+    cookies = {
+        "access_token_cookie": tokens.access_token_cookie,
+        "refresh_token_cookie": tokens.refresh_token_cookie,
+    }
+    refresh_tokens = []
+    for _ in range(2):
+        _, status, response_cookies = await make_post_request(path, cookies=cookies)
+        assert status == HTTPStatus.OK
+        refresh_tokens.append(response_cookies.get("refresh_token_cookie").coded_value)
+
+    assert refresh_tokens[0] == refresh_tokens[1]
 
 
 @pytest.mark.parametrize(
@@ -193,6 +314,7 @@ async def test_logout(
     create_tokens,
     set_token,
     get_tokens,
+    session_id,
     clear_cache,
     query_data,
     expected_answer,
@@ -216,4 +338,627 @@ async def test_logout(
         cache_tokens = await get_tokens(query_data)
         if cache_tokens and not query_data.get("for_all_sessions"):
             cahche_tokens = [str(token, encoding=("utf-8")) for token in cache_tokens]
-            assert tokens.refresh_token_cookie not in cahche_tokens
+            assert session_id(tokens.refresh_token_cookie) not in cahche_tokens
+
+
+def opaque_token(user_uuid: str) -> str:
+    return f"{user_uuid}.{secrets.token_urlsafe(32)}"
+
+
+@pytest.mark.parametrize("for_all_sessions", [0, 1])
+@pytest.mark.asyncio
+async def test_logout_forged_refresh_token(
+    make_post_request,
+    create_tokens,
+    set_token,
+    get_tokens,
+    clear_cache,
+    for_all_sessions,
+):
+    await clear_cache()
+
+    tokens = await create_tokens(UserClaims(user_uuid=id_good_1, role_uuid=id_good_1))
+    await set_token(id_good_1, tokens.refresh_token_cookie)
+    sessions = await get_tokens(id_good_1)
+
+    _, status, _ = await make_post_request(
+        "/tokens/logout/",
+        query_data={"for_all_sessions": for_all_sessions},
+        cookies={"refresh_token_cookie": opaque_token(id_good_1)},
+    )
+
+    assert status == HTTPStatus.UNAUTHORIZED
+    assert await get_tokens(id_good_1) == sessions
+
+
+@pytest.mark.asyncio
+async def test_opaque_refresh_tokens(
+    make_post_request,
+    postgres_write_data,
+    postgres_execute,
+    validate_token,
+    get_tokens,
+    session_id,
+    clear_cache,
+):
+    if not settings.opaque_refresh_tokens:
+        pytest.skip("OPAQUE_REFRESH_TOKENS is off")
+    await postgres_execute(del_history_query)
+    await postgres_execute(del_query_user)
+    await postgres_execute(del_query_role_perm)
+    await postgres_execute(del_query_role)
+    await clear_cache()
+
+    await postgres_write_data([role_super_data], "roles")
+    await postgres_write_data([user_super_data], "users")
+
+    _, status, cookies = await make_post_request(
+        "/tokens/login/", body=token_request_login
+    )
+    assert status == HTTPStatus.OK
+    refresh_token = cookies.get("refresh_token_cookie").coded_value
+    user_uuid, _, secret = refresh_token.partition(".")
+    assert user_uuid == id_super
+    assert secret and "." not in secret
+
+    _, status, cookies = await make_post_request(
+        "/tokens/refresh/", cookies={"refresh_token_cookie": refresh_token}
+    )
+    assert status == HTTPStatus.OK
+    new_refresh_token = cookies.get("refresh_token_cookie").coded_value
+    access_token = cookies.get("access_token_cookie").coded_value
+    assert new_refresh_token != refresh_token
+    assert (await validate_token(access_token)).get("user_uuid") == id_super
+    sessions = [str(token, encoding="utf-8") for token in await get_tokens(id_super)]
+    assert session_id(new_refresh_token) in sessions
+    assert session_id(refresh_token) not in sessions
+
+    _, status, _ = await make_post_request(
+        "/tokens/logout/",
+        query_data={"for_all_sessions": 0},
+        cookies={"refresh_token_cookie": new_refresh_token},
+    )
+    assert status == HTTPStatus.OK
+    assert await get_tokens(id_super) is None
+
+    _, status, _ = await make_post_request(
+        "/tokens/refresh/", cookies={"refresh_token_cookie": new_refresh_token}
+    )
+    assert status == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_opaque_logout_all_sessions(
+    make_post_request,
+    set_token,
+    get_tokens,
+    clear_cache,
+):
+    if not settings.opaque_refresh_tokens:
+        pytest.skip("OPAQUE_REFRESH_TOKENS is off")
+    await clear_cache()
+
+    refresh_tokens = [opaque_token(id_good_1) for _ in range(2)]
+    for refresh_token in refresh_tokens:
+        await set_token(id_good_1, refresh_token)
+    await set_token(id_good_2, opaque_token(id_good_2))
+
+    _, status, _ = await make_post_request(
+        "/tokens/logout/",
+        query_data={"for_all_sessions": 1},
+        cookies={"refresh_token_cookie": refresh_tokens[0]},
+    )
+
+    assert status == HTTPStatus.OK
+    assert await get_tokens(id_good_1) is None
+    assert await get_tokens(id_good_2) is not None
+
+
+@pytest.mark.asyncio
+async def test_verify_after_logout(
+    make_post_request,
+    postgres_write_data,
+    postgres_execute,
+    clear_cache,
+):
+    await postgres_execute(del_history_query)
+    await postgres_execute(del_query_user)
+    await postgres_execute(del_query_role_perm)
+    await postgres_execute(del_query_role)
+    await clear_cache()
+
+    await postgres_write_data([role_super_data], "roles")
+    await postgres_write_data([user_super_data], "users")
+
+    _, status, cookies = await make_post_request(
+        "/tokens/login/", body=token_request_login
+    )
+    assert status == HTTPStatus.OK
+    cookies = {
+        "access_token_cookie": cookies.get("access_token_cookie").coded_value,
+        "refresh_token_cookie": cookies.get("refresh_token_cookie").coded_value,
+    }
+
+    _, status, _ = await make_post_request("/tokens/verify/", cookies=cookies)
+    assert status == HTTPStatus.OK
+
+    _, status, _ = await make_post_request(
+        "/tokens/logout/", query_data={"for_all_sessions": 0}, cookies=cookies
+    )
+    assert status == HTTPStatus.OK
+
+    _, status, _ = await make_post_request("/tokens/verify/", cookies=cookies)
+    assert status == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.parametrize(
+    "query_data, expected_answer",
+    [
+        (
+            {"user_uuids": [id_good_1, id_good_2]},
+            {"status": HTTPStatus.OK, "revoked": 2},
+        ),
+        (
+            {},
+            {"status": HTTPStatus.UNPROCESSABLE_ENTITY},
+        ),
+        (
+            {"user_uuids": [id_good_1] * (settings.cache_bulk_max_users + 1)},
+            {"status": HTTPStatus.UNPROCESSABLE_ENTITY},
+        ),
+    ],
+)
+@pytest.mark.asyncio
+async def test_revoke_sessions(
+    make_post_request,
+    postgres_write_data,
+    postgres_execute,
+    create_tokens,
+    set_token,
+    get_tokens,
+    clear_cache,
+    query_data,
+    expected_answer,
+):
+    await postgres_execute(del_history_query)
+    await postgres_execute(del_query_user)
+    await postgres_execute(del_query_role_perm)
+    await postgres_execute(del_query_role)
+    await clear_cache()
+
+    await postgres_write_data([role_super_data], "roles")
+    await postgres_write_data([user_super_data], "users")
+
+    payload = UserClaims(user_uuid=id_super, role_uuid=id_super)
+    tokens = await create_tokens(payload)
+    await set_token(id_super, tokens.refresh_token_cookie)
+    for user_uuid in (id_good_1, id_good_2):
+        user_tokens = await create_tokens(
+            UserClaims(user_uuid=user_uuid, role_uuid=user_uuid)
+        )
+        await set_token(user_uuid, user_tokens.refresh_token_cookie)
+
+    path = "/tokens/sessions/revoke/"
+    cookies = {
+        "access_token_cookie": tokens.access_token_cookie,
+        "refresh_token_cookie": tokens.refresh_token_cookie,
+    }
+    response = await make_post_request(path, body=query_data, cookies=cookies)
+    body, status, _ = response
+
+    assert status == expected_answer.get("status")
+    if status == HTTPStatus.OK:
+        progress = json.loads(body.splitlines()[-1])
+        assert progress == {"revoked": expected_answer.get("revoked"), "done": True}
+        for user_uuid in query_data.get("user_uuids"):
+            assert await get_tokens(user_uuid) is None
+        assert await get_tokens(id_super) is not None
+
+
+@pytest.mark.asyncio
+async def test_verify_batch(
+    make_post_request,
+    create_tokens,
+    clear_cache,
+):
+    await clear_cache()
+
+    payload = UserClaims(user_uuid=id_good_1, role_uuid=id_good_1)
+    tokens = await create_tokens(payload)
+    invalid_tokens = await create_tokens(payload, secret_key=invalid_secret_key)
+    body = {
+        "tokens": [
+            tokens.access_token_cookie,
+            invalid_tokens.access_token_cookie,
+            "not-a-token",
+        ]
+    }
+    response = await make_post_request("/tokens/verify/batch/", body=body)
+    body, status, _ = response
+
+    assert status == HTTPStatus.OK
+    results = body.get("results")
+    assert [result.get("valid") for result in results] == [True, False, False]
+    assert results[0].get("claims").get("user_uuid") == id_good_1
+    assert results[1].get("claims") is None
+
+
+@pytest.mark.parametrize(
+    "algorithm, claims",
+    [
+        ("HS512", {}),
+        ("HS256", {"nbf": int(time.time()) + 3600}),
+        ("HS256", {"iat": "yesterday"}),
+    ],
+)
+@pytest.mark.asyncio
+async def test_verify_batch_unusable_token(
+    make_post_request,
+    create_tokens,
+    clear_cache,
+    algorithm,
+    claims,
+):
+    await clear_cache()
+
+    payload = UserClaims(user_uuid=id_good_1, role_uuid=id_good_1)
+    tokens = await create_tokens(payload)
+    unusable_token = jwt.encode(
+        payload={**payload.model_dump(), "type": "access", **claims},
+        key=settings.secret_key,
+        algorithm=algorithm,
+    )
+    body = {"tokens": [tokens.access_token_cookie, unusable_token]}
+    response = await make_post_request("/tokens/verify/batch/", body=body)
+    body, status, _ = response
+
+    assert status == HTTPStatus.OK
+    results = body.get("results")
+    assert [result.get("valid") for result in results] == [True, False]
+    assert results[1].get("detail")
+
+
+@pytest.mark.asyncio
+async def test_verify_batch_rate_limit(
+    make_client_post_request,
+    create_tokens,
+):
+    tokens = await create_tokens(UserClaims(user_uuid=id_good_1, role_uuid=id_good_1))
+    body = {"tokens": [tokens.access_token_cookie]}
+
+    responses = await asyncio.gather(
+        *(
+            make_client_post_request("/tokens/verify/batch/", "10.2.0.1", body=body)
+            for _ in range(settings.verify_batch_rate_limit + 1)
+        )
+    )
+
+    statuses = [status for status, _ in responses]
+    assert set(statuses) <= {HTTPStatus.OK, HTTPStatus.TOO_MANY_REQUESTS}
+    assert HTTPStatus.TOO_MANY_REQUESTS in statuses
+    # other clients are limited on their own
+    status, _ = await make_client_post_request(
+        "/tokens/verify/batch/", "10.2.0.2", body=body
+    )
+    assert status == HTTPStatus.OK
+
+
+@pytest.mark.asyncio
+async def test_verify_during_login_storm(
+    make_post_request,
+    make_client_post_request,
+    postgres_write_data,
+    postgres_execute,
+    create_tokens,
+    clear_cache,
+):
+    await postgres_execute(del_history_query)
+    await postgres_execute(del_query_user)
+    await postgres_execute(del_query_role_perm)
+    await postgres_execute(del_query_role)
+    await clear_cache()
+
+    await postgres_write_data([role_super_data], "roles")
+    await postgres_write_data([user_super_data], "users")
+    tokens = await create_tokens(UserClaims(user_uuid=id_super, role_uuid=id_super))
+
+    started = time.monotonic()
+    storm = asyncio.gather(
+        *(
+            make_client_post_request(
+                "/tokens/login/", f"10.0.0.{client}", body=token_request_login
+            )
+            for client in range(settings.admission_max_concurrency * 2)
+        )
+    )
+    await asyncio.sleep(0.1)
+    verify_started = time.monotonic()
+    body, status, _ = await make_post_request(
+        "/tokens/verify/batch/", body={"tokens": [tokens.access_token_cookie]}
+    )
+    verify_elapsed = time.monotonic() - verify_started
+    logins = await storm
+    storm_elapsed = time.monotonic() - started
+
+    assert status == HTTPStatus.OK
+    assert body.get("results")[0].get("valid")
+    assert [status for status, _ in logins] == [HTTPStatus.OK] * len(logins)
+    # Hashed on the event loop, the passwords would hold the check back
+    # until the whole storm is done.
+    assert verify_elapsed < storm_elapsed / 2
+
+
+@pytest.mark.asyncio
+async def test_login_storm_is_shed(
+    make_client_post_request,
+    postgres_write_data,
+    postgres_execute,
+    clear_cache,
+):
+    await postgres_execute(del_history_query)
+    await postgres_execute(del_query_user)
+    await postgres_execute(del_query_role_perm)
+    await postgres_execute(del_query_role)
+    await clear_cache()
+
+    await postgres_write_data([role_super_data], "roles")
+    await postgres_write_data([user_super_data], "users")
+
+    capacity = settings.admission_max_concurrency + settings.admission_max_queue
+    logins = await asyncio.gather(
+        *(
+            make_client_post_request(
+                "/tokens/login/",
+                f"10.1.{client // 256}.{client % 256}",
+                body=token_request_login,
+            )
+            for client in range(capacity * 4)
+        )
+    )
+
+    statuses = [status for status, _ in logins]
+    assert set(statuses) <= {HTTPStatus.OK, HTTPStatus.SERVICE_UNAVAILABLE}
+    assert HTTPStatus.OK in statuses
+    assert HTTPStatus.SERVICE_UNAVAILABLE in statuses
+    for status, headers in logins:
+        if status == HTTPStatus.SERVICE_UNAVAILABLE:
+            assert headers.get("Retry-After") == str(
+                settings.admission_retry_after_in_seconds
+            )
+
+
+@pytest.mark.parametrize(
+    "query_data, expected_answer",
+    [
+        (
+            {"signed_with": "current", "kid_of": "current"},
+            {"valid": True},
+        ),
+        (
+            {"signed_with": "current", "kid_of": "unknown"},
+            {"valid": False},
+        ),
+        (
+            {"signed_with": "unknown", "kid_of": "current"},
+            {"valid": False},
+        ),
+    ],
+)
+@pytest.mark.asyncio
+async def test_verify_by_key_id(
+    make_post_request,
+    create_tokens,
+    key_id,
+    clear_cache,
+    query_data,
+    expected_answer,
+):
+    await clear_cache()
+
+    keys = {"current": settings.secret_key, "unknown": invalid_secret_key}
+    tokens = await create_tokens(
+        UserClaims(user_uuid=id_good_1, role_uuid=id_good_1),
+        secret_key=keys[query_data.get("signed_with")],
+        kid=key_id(keys[query_data.get("kid_of")]),
+    )
+    body = {"tokens": [tokens.access_token_cookie]}
+    body, status, _ = await make_post_request("/tokens/verify/batch/", body=body)
+
+    assert status == HTTPStatus.OK
+    assert body.get("results")[0].get("valid") == expected_answer.get("valid")
+
+
+@pytest.mark.asyncio
+async def test_verify_with_previous_key(
+    make_post_request,
+    create_tokens,
+    key_id,
+    clear_cache,
+):
+    if not settings.previous_keys:
+        pytest.skip("AUTHJWT_PREVIOUS_KEYS is not set")
+    await clear_cache()
+
+    payload = UserClaims(user_uuid=id_good_1, role_uuid=id_good_1)
+    tokens = [
+        (
+            await create_tokens(payload, secret_key=key, kid=key_id(key))
+        ).access_token_cookie
+        for key in settings.previous_keys
+    ]
+    body, status, _ = await make_post_request(
+        "/tokens/verify/batch/", body={"tokens": tokens}
+    )
+
+    assert status == HTTPStatus.OK
+    assert all(result.get("valid") for result in body.get("results"))
+
+
+@pytest.mark.asyncio
+async def test_login_tokens_carry_key_id(
+    make_post_request,
+    postgres_write_data,
+    postgres_execute,
+    validate_token,
+    key_id,
+    clear_cache,
+):
+    await postgres_execute(del_history_query)
+    await postgres_execute(del_query_user)
+    await postgres_execute(del_query_role_perm)
+    await postgres_execute(del_query_role)
+    await clear_cache()
+
+    await postgres_write_data([role_super_data], "roles")
+    await postgres_write_data([user_super_data], "users")
+
+    _, status, cookies = await make_post_request(
+        "/tokens/login/", body=token_request_login
+    )
+    assert status == HTTPStatus.OK
+    access_token = cookies.get("access_token_cookie").coded_value
+    refresh_token = cookies.get("refresh_token_cookie").coded_value
+
+    assert jwt.get_unverified_header(access_token).get("kid") == key_id(
+        settings.secret_key
+    )
+    user_data = await validate_token(access_token)
+    assert user_data.get("user_uuid") == id_super
+    # An opaque refresh token is not a JWT and has no header.
+    if refresh_token.count(".") == 2:
+        assert jwt.get_unverified_header(refresh_token).get("kid") == key_id(
+            settings.secret_key
+        )
+
+
+@pytest.mark.asyncio
+async def test_jwks(session):
+    url = "http://" + settings.get_api_host + "/.well-known/jwks.json"
+    async with session.get(url) as response:
+        body = await response.json()
+
+    assert response.status == HTTPStatus.OK
+    assert "max-age=" in response.headers.get("Cache-Control")
+    # A shared secret signs the tokens of the test environment and is
+    # never published.
+    assert body == {"keys": []}
+
+
+@pytest.mark.parametrize("permission_claims", ["none", "names", "bitmask"])
+@pytest.mark.asyncio
+async def test_login_permission_claims(
+    make_post_request,
+    make_get_request,
+    postgres_write_data,
+    postgres_execute,
+    validate_token,
+    clear_cache,
+    permission_claims,
+):
+    if settings.permission_claims != permission_claims:
+        pytest.skip(f"TOKEN_PERMISSION_CLAIMS is {settings.permission_claims}")
+    await postgres_execute(del_history_query)
+    await postgres_execute(del_query_user)
+    await postgres_execute(del_query_role_perm)
+    await postgres_execute(del_query_role)
+    await postgres_execute(del_query_permission)
+    await clear_cache()
+
+    # A role of its own, so no permissions cached for another test are used.
+    role_uuid = ids[0]
+    await postgres_write_data([{**role_super_data, "uuid": role_uuid}], "roles")
+    await postgres_write_data([{**user_super_data, "role_uuid": role_uuid}], "users")
+    permission_3 = {**permission_1, "uuid": ids[1], "name": "Кино"}
+    await postgres_write_data([permission_1, permission_2, permission_3], "permissions")
+    relations = [
+        {
+            "uuid": ids[2],
+            "role_uuid": role_uuid,
+            "permission_uuid": permission_1["uuid"],
+        },
+        {
+            "uuid": ids[3],
+            "role_uuid": role_uuid,
+            "permission_uuid": permission_2["uuid"],
+        },
+    ]
+    await postgres_write_data(relations, "roles_permissions")
+    role_permissions = {permission_1["name"], permission_2["name"]}
+
+    async def login_claims():
+        _, status, cookies = await make_post_request(
+            "/tokens/login/", body=token_request_login
+        )
+        assert status == HTTPStatus.OK
+        access_token = cookies.get("access_token_cookie").coded_value
+        return access_token, await validate_token(access_token)
+
+    async def bitmask_permissions(access_token, claims):
+        body, status, _ = await make_get_request(
+            "/permissions/catalog/", cookies={"access_token_cookie": access_token}
+        )
+        assert status == HTTPStatus.OK
+        if claims.get("pv") != body.get("version"):
+            return None
+        mask = int(claims.get("perms"), 16)
+        assert mask < 1 << len(body.get("permissions"))
+        return {
+            name for bit, name in enumerate(body.get("permissions")) if mask >> bit & 1
+        }
+
+    access_token, claims = await login_claims()
+    if permission_claims == "none":
+        assert "perms" not in claims
+        assert "pv" not in claims
+    elif permission_claims == "names":
+        assert set(claims.get("perms")) == role_permissions
+        assert "pv" not in claims
+    else:
+        # The catalog is cached by every worker, so a catalog built before
+        # the permissions were written is used until its TTL is over.
+        deadline = time.monotonic() + settings.permission_cache_ttl_in_seconds + 1
+        permissions = await bitmask_permissions(access_token, claims)
+        while permissions != role_permissions and time.monotonic() < deadline:
+            await asyncio.sleep(1)
+            access_token, claims = await login_claims()
+            permissions = await bitmask_permissions(access_token, claims)
+        assert permissions == role_permissions
+
+
+@pytest.mark.parametrize(
+    "is_superuser, expected_answer",
+    [
+        (True, {"status": HTTPStatus.OK}),
+        (False, {"status": HTTPStatus.FORBIDDEN}),
+    ],
+)
+@pytest.mark.asyncio
+async def test_worker_stats(
+    make_get_request,
+    postgres_write_data,
+    postgres_execute,
+    create_tokens,
+    is_superuser,
+    expected_answer,
+):
+    await postgres_execute(del_history_query)
+    await postgres_execute(del_query_user)
+    await postgres_execute(del_query_role_perm)
+    await postgres_execute(del_query_role)
+
+    await postgres_write_data([role_super_data], "roles")
+    await postgres_write_data(
+        [{**user_super_data, "is_superuser": is_superuser}], "users"
+    )
+    tokens = await create_tokens(UserClaims(user_uuid=id_super, role_uuid=id_super))
+
+    body, status, _ = await make_get_request(
+        "/tokens/stats/", cookies={"access_token_cookie": tokens.access_token_cookie}
+    )
+
+    assert status == expected_answer.get("status")
+    if status == HTTPStatus.OK:
+        assert isinstance(body.get("pid"), int)
+        assert 0 <= body.get("decode_cache").get("hit_ratio") <= 1
+        assert "queue_depth" in body.get("token_signer")
+        assert "queue_depth" in body.get("password_hasher")
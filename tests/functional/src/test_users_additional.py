@@ -11,6 +11,7 @@ from tests.functional import (
     role_super_data,
     user_change_pass_data,
     user_invalid_pass_data,
+    token_request_login,
 )
 from tests.functional import (
     del_query as del_query_role,
@@ -302,3 +303,117 @@ async def test_change_user_role(
                 f"быть ключи `{expected_answer.get('keys')}`."
             )
         assert body.get("role").get("uuid") == query_data.get("role_uuid")
+
+
+@pytest.mark.parametrize(
+    "query_data, expected_answer",
+    [
+        (
+            {"user_id": id_super},
+            {"status": HTTPStatus.OK, "length": 1},
+        ),
+        (
+            {"user_id": id_good_1},
+            {"status": HTTPStatus.OK, "length": 0},
+        ),
+        (
+            {"user_id": id_invalid},
+            {"status": HTTPStatus.UNPROCESSABLE_ENTITY},
+        ),
+    ],
+)
+@pytest.mark.asyncio
+async def test_get_user_sessions(
+    make_get_request,
+    make_post_request,
+    postgres_write_data,
+    postgres_execute,
+    clear_cache,
+    query_data,
+    expected_answer,
+):
+    await postgres_execute(del_history_query)
+    await postgres_execute(del_query_user)
+    await postgres_execute(del_query_role_perm)
+    await postgres_execute(del_query_role)
+    await clear_cache()
+
+    await postgres_write_data([role_super_data], "roles")
+    await postgres_write_data([user_super_data], "users")
+
+    _, status, cookies = await make_post_request(
+        "/tokens/login/", body=token_request_login
+    )
+    assert status == HTTPStatus.OK
+    cookies = {
+        "access_token_cookie": cookies.get("access_token_cookie").coded_value,
+        "refresh_token_cookie": cookies.get("refresh_token_cookie").coded_value,
+    }
+
+    path = f"/users/{query_data.get('user_id')}/sessions/"
+    response = await make_get_request(path, cookies=cookies)
+    body, status, _ = response
+
+    assert status == expected_answer.get("status")
+    if status == HTTPStatus.OK:
+        assert len(body) == expected_answer.get("length")
+        for session in body:
+            assert session.get("device")
+            assert session.get("issued_at") < session.get("expires_at")
+
+
+@pytest.mark.parametrize(
+    "query_data, expected_answer",
+    [
+        (
+            {"logout": True},
+            {"status": HTTPStatus.UNAUTHORIZED},
+        ),
+        (
+            {"delete_user": True},
+            {"status": HTTPStatus.NOT_FOUND},
+        ),
+    ],
+)
+@pytest.mark.asyncio
+async def test_get_user_sessions_revoked_or_deleted(
+    make_get_request,
+    make_post_request,
+    postgres_write_data,
+    postgres_execute,
+    clear_cache,
+    query_data,
+    expected_answer,
+):
+    await postgres_execute(del_history_query)
+    await postgres_execute(del_query_user)
+    await postgres_execute(del_query_role_perm)
+    await postgres_execute(del_query_role)
+    await clear_cache()
+
+    await postgres_write_data([role_super_data], "roles")
+    await postgres_write_data([user_super_data], "users")
+
+    _, status, cookies = await make_post_request(
+        "/tokens/login/", body=token_request_login
+    )
+    assert status == HTTPStatus.OK
+    cookies = {
+        "access_token_cookie": cookies.get("access_token_cookie").coded_value,
+        "refresh_token_cookie": cookies.get("refresh_token_cookie").coded_value,
+    }
+    path = f"/users/{id_super}/sessions/"
+    _, status, _ = await make_get_request(path, cookies=cookies)
+    assert status == HTTPStatus.OK
+
+    if query_data.get("logout"):
+        _, status, _ = await make_post_request(
+            "/tokens/logout/", query_data={"for_all_sessions": 0}, cookies=cookies
+        )
+        assert status == HTTPStatus.OK
+    if query_data.get("delete_user"):
+        await postgres_execute(del_history_query)
+        await postgres_execute(del_query_user)
+
+    _, status, _ = await make_get_request(path, cookies=cookies)
+    assert status == expected_answer.get("status")
@@ -14,6 +14,15 @@ user_super_data = {
     "role_uuid": id_super,
 }
 
+old_password_policy = "pbkdf2:sha256:1000"
+
+user_super_old_hash_data = {
+    **user_super_data,
+    "password": generate_password_hash(
+        "[2/#&/%M9:aOIzJ-Xb.0Ncod?HoQih", old_password_policy
+    ),
+}
+
 role_super_data = {
     "name": "Роль админ",
     "uuid": id_super,
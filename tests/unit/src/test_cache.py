@@ -0,0 +1,210 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+
+from src.cache.memory import MemoryCache
+from src.cache.redis import RedisCache
+from src.configs import settings
+
+# The same scenarios run against both backends, so MemoryCache is checked
+# to behave as RedisCache. The Redis backend uses the Redis of the settings
+# and is skipped when it is not reachable. Every test works with users of
+# its own, so nothing is flushed.
+
+TTL = 600
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(MemoryCache, "_now", staticmethod(lambda: int(clock.now)))
+    monkeypatch.setattr(RedisCache, "_clock", staticmethod(lambda: clock.now))
+    return clock
+
+
+@pytest_asyncio.fixture(params=["memory", "redis"])
+async def make_cache(request, clock):
+    clients = []
+
+    async def inner(**token_settings):
+        token_settings = settings.token.model_copy(
+            update={
+                "expire_time_in_minutes": TTL // 60,
+                "user_max_sessions": 2,
+                "sliding_expiry": False,
+                "absolute_expire_time_in_minutes": 0,
+                "refresh_grace_period_in_seconds": 0,
+                **token_settings,
+            }
+        )
+        if request.param == "memory":
+            return MemoryCache(settings=token_settings)
+        client = settings.redis.create_client()
+        clients.append(client)
+        try:
+            await client.ping()
+        except Exception:
+            pytest.skip("Redis is not reachable")
+        return RedisCache(client, settings=token_settings)
+
+    yield inner
+    for client in clients:
+        await client.aclose()
+
+
+def user() -> str:
+    return str(uuid4())
+
+
+@pytest.mark.asyncio
+async def test_session_expires_after_ttl(make_cache, clock):
+    cache = await make_cache()
+    user_uuid = user()
+
+    await cache.set_token(user_uuid, "token", device="agent", role_uuid="role")
+    sessions = await cache.get_sessions(user_uuid)
+    [session] = sessions.values()
+    assert session.issued_at == int(clock.now)
+    assert session.expires_at == int(clock.now) + TTL
+    assert session.device == "agent"
+    assert session.role_uuid == "role"
+
+    clock.advance(TTL - 1)
+    assert await cache.get_sessions(user_uuid)
+    clock.advance(1)
+    assert await cache.get_sessions(user_uuid) is None
+    assert await cache.rotate_token(user_uuid, "token", "new") is None
+
+
+@pytest.mark.asyncio
+async def test_eviction_order(make_cache, clock):
+    cache = await make_cache()
+    user_uuid = user()
+
+    # the sessions of the same second are evicted in the order of creation
+    for token in ("first", "second", "third"):
+        await cache.set_token(user_uuid, token)
+        clock.advance(0.001)
+    assert await cache.rotate_token(user_uuid, "first", "x") is None
+    assert await cache.rotate_token(user_uuid, "second", "second-2")
+
+    # otherwise the session that expires first is evicted
+    clock.advance(10)
+    await cache.set_token(user_uuid, "fourth")
+    assert await cache.rotate_token(user_uuid, "second-2", "x") is None
+    assert await cache.rotate_token(user_uuid, "third", "third-2")
+    assert len(await cache.get_sessions(user_uuid)) == 2
+
+
+@pytest.mark.asyncio
+async def test_rotation(make_cache, clock):
+    cache = await make_cache()
+    user_uuid = user()
+    await cache.set_token(user_uuid, "token", role_uuid="role")
+    issued_at = int(clock.now)
+
+    clock.advance(60)
+    rotated = await cache.rotate_token(user_uuid, "token", "new")
+    assert rotated.refresh == "new"
+    assert rotated.role_uuid == "role"
+    [session] = (await cache.get_sessions(user_uuid)).values()
+    assert session.issued_at == issued_at
+    assert session.expires_at == issued_at + TTL
+    assert session.last_used_at == int(clock.now)
+
+    # a spent token and the token of another user are refused
+    assert await cache.rotate_token(user_uuid, "token", "again") is None
+    assert await cache.rotate_token(user(), "new", "again") is None
+    assert await cache.rotate_token(user_uuid, "new", "newer")
+
+
+@pytest.mark.asyncio
+async def test_grace_period(make_cache, clock):
+    cache = await make_cache(refresh_grace_period_in_seconds=1)
+    user_uuid = user()
+    await cache.set_token(user_uuid, "token", role_uuid="role")
+
+    assert (await cache.rotate_token(user_uuid, "token", "new")).refresh == "new"
+    # a concurrent refresh with the old token gets the same new token
+    rotated = await cache.rotate_token(user_uuid, "token", "other")
+    assert rotated.refresh == "new"
+    assert rotated.role_uuid == "role"
+    assert len(await cache.get_sessions(user_uuid)) == 1
+
+    # the Redis grace record expires in real time
+    await asyncio.sleep(1.1)
+    clock.advance(2)
+    assert await cache.rotate_token(user_uuid, "token", "other") is None
+
+
+@pytest.mark.asyncio
+async def test_grace_period_ends_with_the_new_session(make_cache, clock):
+    cache = await make_cache(refresh_grace_period_in_seconds=10)
+    user_uuid = user()
+    await cache.set_token(user_uuid, "token")
+
+    assert await cache.rotate_token(user_uuid, "token", "new")
+    assert await cache.delete_tokens(user_uuid, "new")
+    assert await cache.rotate_token(user_uuid, "token", "other") is None
+
+
+@pytest.mark.asyncio
+async def test_sliding_expiry_cap(make_cache, clock):
+    cache = await make_cache(sliding_expiry=True, absolute_expire_time_in_minutes=15)
+    user_uuid = user()
+    await cache.set_token(user_uuid, "token")
+    issued_at = int(clock.now)
+
+    clock.advance(300)
+    assert await cache.rotate_token(user_uuid, "token", "second")
+    [session] = (await cache.get_sessions(user_uuid)).values()
+    assert session.expires_at == int(clock.now) + TTL
+
+    clock.advance(300)
+    assert await cache.rotate_token(user_uuid, "second", "third")
+    [session] = (await cache.get_sessions(user_uuid)).values()
+    assert session.expires_at == issued_at + 15 * 60
+
+    clock.advance(300)
+    assert await cache.rotate_token(user_uuid, "third", "fourth") is None
+    assert await cache.get_sessions(user_uuid) is None
+
+
+@pytest.mark.asyncio
+async def test_delete_tokens(make_cache, clock):
+    cache = await make_cache(user_max_sessions=3)
+    user_uuid = user()
+    for token in ("first", "second", "third"):
+        await cache.set_token(user_uuid, token)
+
+    # a token without a live session deletes nothing
+    assert not await cache.delete_tokens(user_uuid, "forged", all_tokens=True)
+    assert len(await cache.get_sessions(user_uuid)) == 3
+
+    assert await cache.delete_tokens(user_uuid, "first")
+    assert len(await cache.get_sessions(user_uuid)) == 2
+    assert await cache.delete_tokens(user_uuid, "second", all_tokens=True)
+    assert await cache.get_sessions(user_uuid) is None
+
+
+@pytest.mark.asyncio
+async def test_delete_sessions(make_cache, clock):
+    cache = await make_cache()
+    users = [user() for _ in range(3)]
+    for user_uuid in users:
+        await cache.set_token(user_uuid, "token")
+
+    await cache.delete_sessions(users[:2])
+    assert await cache.get_sessions(users[0]) is None
+    assert await cache.get_sessions(users[1]) is None
+    assert await cache.get_sessions(users[2])
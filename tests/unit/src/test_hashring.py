@@ -0,0 +1,49 @@
+import pytest
+
+from src.utils.hashring import ConsistentHashRing
+
+NODES = [f"redis-{number}:6379" for number in range(4)]
+KEYS = [f"user-{number}" for number in range(20_000)]
+
+
+def assignment(ring: ConsistentHashRing) -> dict[str, str]:
+    return {key: ring.get_node(key) for key in KEYS}
+
+
+def test_add_node_moves_its_share_to_it():
+    ring = ConsistentHashRing(NODES)
+    before = assignment(ring)
+
+    ring.add_node("redis-4:6379")
+    after = assignment(ring)
+
+    moved = [key for key in KEYS if before[key] != after[key]]
+    assert all(after[key] == "redis-4:6379" for key in moved)
+    assert len(moved) / len(KEYS) == pytest.approx(1 / (len(NODES) + 1), abs=0.05)
+
+
+def test_remove_node_moves_only_its_keys():
+    ring = ConsistentHashRing(NODES)
+    before = assignment(ring)
+
+    ring.remove_node("redis-1:6379")
+    after = assignment(ring)
+
+    moved = {key for key in KEYS if before[key] != after[key]}
+    assert moved == {key for key in KEYS if before[key] == "redis-1:6379"}
+    assert "redis-1:6379" not in after.values()
+
+
+def test_add_then_remove_node_restores_assignment():
+    ring = ConsistentHashRing(NODES)
+    before = assignment(ring)
+
+    ring.add_node("redis-4:6379")
+    ring.remove_node("redis-4:6379")
+
+    assert assignment(ring) == before
+
+
+def test_empty_ring():
+    with pytest.raises(LookupError):
+        ConsistentHashRing([]).get_node("user")